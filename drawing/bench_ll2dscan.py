@@ -0,0 +1,82 @@
+import argparse
+import time
+import numpy as np
+from scipy.interpolate import griddata
+
+from ll2dscan import interpolate
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--nbins", type=str, default="200,500",
+                        help="Comma-delimited number of points in each "\
+                             "dimension of the synthetic scans")
+    parser.add_argument("--missing", type=float, default=0.02,
+                        help="Fraction of scan points dropped (failed fits)")
+    parser.add_argument("--seed", type=int, default=123456,
+                        help="Random seed for the dropped points")
+
+    return parser.parse_args()
+
+def interpolate_reference(xscan, yscan, zscan, xrange, yrange, nbins):
+    # The previous dict lookup, python loop and full triangulation
+    x = np.unique(xscan)
+    y = np.unique(yscan)
+    X, Y = np.meshgrid(x, y)
+
+    z_ix = np.vectorize({v: k for k, v in enumerate(x)}.get)(xscan)
+    z_iy = np.vectorize({v: k for k, v in enumerate(y)}.get)(yscan)
+    Z = -1*np.ones_like(X)
+    for idx, (ix, iy) in enumerate(zip(z_ix, z_iy)):
+        Z[iy, ix] = zscan[idx]
+    Z[Z<0.] = np.nan
+
+    Z = np.ma.masked_invalid(Z)
+    X1 = X[~Z.mask]
+    Y1 = Y[~Z.mask]
+    Z1 = Z[~Z.mask]
+    gd1 = griddata((X1, Y1), Z1.ravel(), (X, Y), method='linear')
+
+    X = X.ravel()
+    Y = Y.ravel()
+    selection = (xrange[0] < X) & (X < xrange[1]) & (yrange[0] < Y) & (Y < yrange[1])
+    nbinsx = (xrange[1] - xrange[0]) / (X.max() - X.min()) * nbins
+    nbinsy = (yrange[1] - yrange[0]) / (Y.max() - Y.min()) * nbins
+    return X[selection], Y[selection], gd1.ravel()[selection], nbinsx, nbinsy
+
+def synthetic_scan(nbins, missing, rng):
+    # Correlated, slightly skewed q surface on a uniform grid with a fraction
+    # of the points removed
+    x = np.linspace(0.7, 1.3, nbins)
+    X, Y = np.meshgrid(x, x)
+    dx, dy = (X.ravel()-1.02)/0.08, (Y.ravel()-0.97)/0.06
+    Z = (dx**2 - 1.2*dx*dy + dy**2)/(1-0.36) + 0.15*dx**3 + 1e-3
+    keep = rng.uniform(size=Z.shape[0]) >= missing
+    return X.ravel()[keep], Y.ravel()[keep], np.minimum(Z[keep], 10.)
+
+def main():
+    options = parse_args()
+    rng = np.random.RandomState(options.seed)
+    xrange, yrange = [0.8, 1.2], [0.8, 1.2]
+
+    print("{:>8} {:>14} {:>16} {:>10} {:>12}".format(
+        "grid", "reference [s]", "searchsorted [s]", "speedup", "max diff",
+    ))
+    for nbins in [int(n) for n in options.nbins.split(",")]:
+        xscan, yscan, zscan = synthetic_scan(nbins, options.missing, rng)
+
+        start = time.time()
+        reference = interpolate_reference(xscan, yscan, zscan, xrange, yrange, nbins)
+        reference_time = time.time() - start
+
+        start = time.time()
+        result = interpolate(xscan, yscan, zscan, xrange, yrange, nbins)
+        result_time = time.time() - start
+
+        print("{:>8} {:>14.3f} {:>16.3f} {:>10.1f} {:>12.2e}".format(
+            "{0}x{0}".format(nbins), reference_time, result_time,
+            reference_time/result_time, np.nanmax(np.abs(reference[2] - result[2])),
+        ))
+
+if __name__ == "__main__":
+    main()
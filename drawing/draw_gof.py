@@ -3,11 +3,18 @@ import uproot
 import numpy as np
 import matplotlib.pyplot as plt
 
+from gof_store import read_store
+from utils.gof import pvalue, pvalue_uncertainty
+
 def parse_args():
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("fobs", type=str, help="File for observed result")
-    parser.add_argument("ftoy", type=str, help="File with toy result")
+    parser.add_argument("fobs", type=str,
+                        help="File for observed result (ROOT file or "\
+                             "gof_store.py store)")
+    parser.add_argument("ftoy", type=str,
+                        help="File with toy result (ROOT file or "\
+                             "gof_store.py store)")
     parser.add_argument("--xlabel", type=str, default=r'$-2\ln\lambda$',
                         help="X-axis label")
     parser.add_argument("-n", "--nbins", type=int, default=50,
@@ -18,6 +25,8 @@ def parse_args():
     return parser.parse_args()
 
 def read_limit(filename):
+    if filename.endswith(".npz"):
+        return read_store(filename)
     with uproot.open(filename) as f:
         tree = f["limit"]
         limits = tree.array("limit")
@@ -48,7 +57,9 @@ def draw_test_stat(toys, gof_obs, pvalue, xlabel, nbins, output):
     ax.legend(handles, labels)
 
     print("Creating {}".format(output))
-    print("p-value = {:.3f}".format(pvalue))
+    print("p-value = {:.3f} +- {:.3f}".format(
+        pvalue, pvalue_uncertainty(pvalue, toys.shape[0]),
+    ))
     fig.savefig(output, format="pdf", bbox_inches="tight")
     plt.close(fig)
 
@@ -58,11 +69,10 @@ def main():
     gof_obs = read_limit(options.fobs)[0]
     toys = read_limit(options.ftoy)
 
-    nabove = toys[toys > gof_obs].shape[0]
-    ntotal = toys.shape[0]
-    pvalue = float(nabove) / ntotal
-
-    draw_test_stat(toys, gof_obs, pvalue, options.xlabel, options.nbins, options.output)
+    draw_test_stat(
+        toys, gof_obs, pvalue(toys, gof_obs), options.xlabel, options.nbins,
+        options.output,
+    )
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,23 @@
 import argparse
-import uproot
+import multiprocessing
+import os
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+from shapes_reader import iter_shapes
+
 def parse_args():
     parser = argparse.ArgumentParser()
-    parser.add_argument("path", type=str, help="Input path")
+    parser.add_argument("path", type=str, nargs="+", help="Input path(s)")
     parser.add_argument("-r", "--regions", type=str, default="monojet",
                         help="List of regions to process")
     parser.add_argument("--doratio", action='store_true', default=False,
                         help="Plot the ratio")
     parser.add_argument("--dopull", action='store_true', default=False,
                         help="Plot the pulls")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of rendering processes (default: number of CPUs)")
     return parser.parse_args()
 
 color_procs = {
@@ -86,9 +92,6 @@ def draw(data, total_bkg, total_bkg_prefit, mc_procs, region_name, output, dorat
         axtop = axes
         axbot = axes
 
-    bins_low = np.array([b.left for b in total_bkg.index.get_level_values("bins").values])
-    bins_upp = np.array([b.right for b in total_bkg.index.get_level_values("bins").values])
-
     bins_low = bin_real_vals[:-1]
     bins_upp = bin_real_vals[1:]
 
@@ -103,7 +106,7 @@ def draw(data, total_bkg, total_bkg_prefit, mc_procs, region_name, output, dorat
 
     mc_procs_sorted = sorted(mc_procs.items(), key=lambda kv: kv[1]["count"].sum())
     mc_procs_sorted_names = [k for k, v in mc_procs_sorted]
-    mc_procs_sorted = [v["count"].values for k, v in mc_procs_sorted]
+    mc_procs_sorted = [v["count"] for k, v in mc_procs_sorted]
 
     axtop.hist(
         [bins_cent]*len(mc_procs_sorted),
@@ -281,62 +284,86 @@ def draw(data, total_bkg, total_bkg_prefit, mc_procs, region_name, output, dorat
     fig.savefig(output, format="pdf", bbox_inches="tight")
     plt.close(fig)
 
+def setup_style():
+    # Shared by every rendering process
+    plt.switch_backend("Agg")
+
+def extract_regions(path, regions):
+    # All histograms needed for the figures of one shapes file, as arrays
+    postfit_regions = [region + "_postfit" for region in regions]
+    prefit_regions = [region + "_prefit" for region in regions]
+
+    def select(region, process, systematic, variation):
+        if systematic != "nominal":
+            return False
+        return region in postfit_regions\
+                or (region in prefit_regions and process == "TotalProcs")
+
+    hists = {}
+    for shape in iter_shapes(path, select):
+        hists[(shape.region, shape.process)] = {
+            "count": shape.values,
+            "variance": shape.variances,
+            "edges": shape.edges,
+        }
+
+    results = []
+    for region, post_fit_region, pre_fit_region in zip(regions, postfit_regions, prefit_regions):
+        results.append({
+            "region": region,
+            "data": hists[(post_fit_region, "data_obs")],
+            "total_bkg": hists[(post_fit_region, "TotalProcs")],
+            "total_bkg_prefit": hists[(pre_fit_region, "TotalProcs")],
+            "mc_procs": {
+                process: arrays for (hist_region, process), arrays in hists.items()
+                if hist_region == post_fit_region
+                and process not in ["TotalBkg", "TotalProcs", "TotalSig", "data_obs"]
+            },
+        })
+    return results
+
+def render(task):
+    region_arrays, output, doratio, dopull = task
+    draw(
+        region_arrays["data"], region_arrays["total_bkg"],
+        region_arrays["total_bkg_prefit"], region_arrays["mc_procs"],
+        region_arrays["region"], output, doratio, dopull,
+    )
+    return output
+
 def main():
     options = parse_args()
-    path = options.path
-
-    with uproot.open(path) as f:
-        for region in options.regions.split(","):
-            post_fit_region = region + "_postfit"
-            pre_fit_region = region + "_prefit"
-            data = f[post_fit_region]["data_obs"].pandas()
-            data.index = data.index.rename("bins")
-
-            total_bkg = f[post_fit_region]["TotalProcs"].pandas()
-            total_bkg.index = total_bkg.index.rename("bins")
-
-            total_bkg_prefit = f[pre_fit_region]["TotalProcs"].pandas()
-            total_bkg_prefit.index = total_bkg_prefit.index.rename("bins")
-
-            mc_proc_names = [
-                k.replace(";1", "")
-                for k in f[post_fit_region].keys()
-                if k.replace(";1", "") not in ["TotalBkg", "TotalProcs", "TotalSig", "data_obs"]
-            ]
-
-            mc_procs = {
-                mc_proc_name: f[post_fit_region][mc_proc_name].pandas()
-                for mc_proc_name in mc_proc_names
-            }
-            for mc_proc in mc_procs.values():
-                mc_proc.index = mc_proc.index.rename("bins")
-
-            #bin_real_widths = (bin_real_vals[1:] - bin_real_vals[:-1])/2
-            #
-            #divisor = np.array(list(
-            #    bin_real_widths[[int(b.left) for b in data.index.get_level_values("bins").values]]
-            #)*2).reshape(data.shape[::-1]).T
-            #data /= divisor
-
-            #divisor = np.array(list(
-            #    bin_real_widths[[int(b.left) for b in total_bkg.index.get_level_values("bins").values]]
-            #)*2).reshape(total_bkg.shape[::-1]).T
-            #total_bkg /= divisor
-
-            new_mc_procs = {}
-            for proc_name, mc_proc in mc_procs.items():
-            #    divisor = np.array(list(
-            #        bin_real_widths[[int(b.left) for b in mc_proc.index.get_level_values("bins").values]]
-            #    )*2).reshape(mc_proc.shape[::-1]).T
-            #    new_mc_procs[proc_name] = mc_proc / divisor
-                new_mc_procs[proc_name] = mc_proc
-
-            draw(
-                data, total_bkg, total_bkg_prefit, new_mc_procs,
-                post_fit_region.replace(";1", "").replace("_postfit", ""),
-                "fit_result_distributions_{}.pdf".format(post_fit_region.replace(";1", "")),
-                options.doratio, options.dopull,
-            )
+    regions = options.regions.split(",")
+
+    start = time.time()
+    tasks = []
+    for path in options.path:
+        for region_arrays in extract_regions(path, regions):
+            output = "fit_result_distributions_{}_postfit.pdf".format(region_arrays["region"])
+            if len(options.path) > 1:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                output = "fit_result_distributions_{}_{}_postfit.pdf".format(
+                    stem, region_arrays["region"],
+                )
+            tasks.append((region_arrays, output, options.doratio, options.dopull))
+    extract_time = time.time() - start
+
+    nproc = min(options.nproc or multiprocessing.cpu_count(), len(tasks))
+    if nproc > 1:
+        pool = multiprocessing.Pool(nproc, initializer=setup_style)
+        outputs = pool.map(render, tasks)
+        pool.close()
+        pool.join()
+    else:
+        setup_style()
+        outputs = [render(task) for task in tasks]
+    total_time = time.time() - start
+
+    print("Rendered {} figures from {} files in {:.1f} s ({:.1f} s extracting, "\
+          "{:.2f} figures/s)".format(
+              len(outputs), len(options.path), total_time, extract_time,
+              len(outputs)/total_time,
+          ))
 
 if __name__ == "__main__":
     main()
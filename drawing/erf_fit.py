@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from scipy.special import erf
+
+# Weighted least-squares fits of the erf turn-on to many data sets at once
+# (e.g. one per POI). Every array has a leading batch axis and a single
+# Levenberg-Marquardt loop updates all of the fits together using the analytic
+# jacobian, each with its own damping. Asymmetric errors are used by taking the
+# up error where the curve lies above the point and the down error below it.
+# Points at an efficiency of 0 or 1 often have a zero error on one side, so
+# errors are floored at the smallest non-zero error of the same fit rather
+# than letting those points pin the curve.
+
+param_names = ["a", "b", "c"]
+
+def erf_func(x, a, b, c):
+    return a*0.5*(1 + erf((x-b)/(np.sqrt(2)*c)))
+
+def erf_jacobian(x, a, b, c):
+    # d erf_func / d(a, b, c) stacked on the last axis
+    u = (x-b)/(np.sqrt(2)*c)
+    gauss = a*np.exp(-u**2)/(np.sqrt(2*np.pi)*c)
+    return np.stack([0.5*(1 + erf(u)), -gauss, -gauss*(x-b)/c], axis=-1)
+
+def _evaluate(x, params):
+    a, b, c = [params[:,i:i+1] for i in range(3)]
+    return erf_func(x, a, b, c), erf_jacobian(x, a, b, c)
+
+def _floor_errors(err_down, err_up):
+    errors = np.concatenate([err_down, err_up], axis=1)
+    floor = np.where(errors > 0, errors, np.inf).min(axis=1, keepdims=True)
+    floor = np.where(np.isfinite(floor), floor, 1.)
+    return np.maximum(err_down, floor), np.maximum(err_up, floor)
+
+def _chi2_terms(y, f, err_down, err_up, weights):
+    sigma = np.where(f > y, err_up, err_down)
+    inv_var = weights/sigma**2
+    return inv_var, ((y - f)**2*inv_var).sum(axis=1)
+
+def fit_erf(x, y, err_down, err_up, p0=(1., 100., 50.), weights=None,
+            max_iter=200, tol=1e-8):
+    # x (npoints,) or (nbatch, npoints), y and errors (nbatch, npoints),
+    # weights (e.g. 0/1 to select points) broadcastable to y. Returns the
+    # parameters (nbatch, 3), their covariance (nbatch, 3, 3) and the chi2.
+    y = np.atleast_2d(y)
+    nbatch = y.shape[0]
+    x = np.broadcast_to(x, y.shape)
+    weights = np.broadcast_to(1. if weights is None else weights, y.shape)
+    err_down, err_up = _floor_errors(
+        np.broadcast_to(err_down, y.shape), np.broadcast_to(err_up, y.shape),
+    )
+    params = np.tile(np.asarray(p0, dtype=float), (nbatch, 1))
+    damping = np.full(nbatch, 1e-3)
+    done = np.zeros(nbatch, dtype=bool)
+
+    f, jac = _evaluate(x, params)
+    inv_var, chi2 = _chi2_terms(y, f, err_down, err_up, weights)
+    for _ in range(max_iter):
+        hess = np.einsum('bni,bn,bnj->bij', jac, inv_var, jac)
+        grad = np.einsum('bni,bn,bn->bi', jac, inv_var, y - f)
+        diag = np.einsum('bii->bi', hess)
+        step = np.linalg.solve(
+            hess + damping[:,None,None]*diag[:,:,None]*np.eye(3),
+            grad[:,:,None],
+        )[:,:,0]
+
+        trial = params + step
+        f_trial, jac_trial = _evaluate(x, trial)
+        inv_var_trial, chi2_trial = _chi2_terms(y, f_trial, err_down, err_up, weights)
+        better = ~done & np.isfinite(chi2_trial) & (chi2_trial <= chi2)
+
+        done |= better & (chi2 - chi2_trial <= tol*np.maximum(chi2, 1.))
+        params[better] = trial[better]
+        f[better], jac[better] = f_trial[better], jac_trial[better]
+        inv_var[better], chi2[better] = inv_var_trial[better], chi2_trial[better]
+        damping = np.where(better, damping/10., damping*10.)
+        if np.all(done | (damping > 1e10)):
+            break
+
+    hess = np.einsum('bni,bn,bnj->bij', jac, inv_var, jac)
+    return params, np.linalg.pinv(hess), chi2
+
+def erf_bands(z, params, cov):
+    # Covariance-propagated 1 sigma widths (nbatch, npoints) of the curves
+    # on the points z
+    a, b, c = [params[:,i:i+1] for i in range(3)]
+    jac = erf_jacobian(z, a, b, c)
+    return np.sqrt(np.einsum('bni,bij,bnj->bn', jac, cov, jac))
+
+def fit_table(names, params, cov):
+    table = pd.DataFrame(params, index=names, columns=param_names)
+    for i, name in enumerate(param_names):
+        table[name+"_err"] = np.sqrt(cov[:,i,i])
+    return table
@@ -1,13 +1,38 @@
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
 import ROOT
 
+from erf_fit import fit_erf, param_names
+
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
 
-def main():
-    with open("trigger_efficiency_eff.pkl", 'r') as f:
-        x, y, yerr = pickle.load(f)
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-i", "--input", type=str, default="trigger_efficiency_eff.pkl",
+                        help="Input pickle with x, y and the (up, down) errors")
+    parser.add_argument("-o", "--output", type=str, default="fit_results.pkl",
+                        help="Output pickle with the fit parameters")
+    parser.add_argument("--bootstrap", type=int, default=0,
+                        help="Number of pseudo-datasets to refit")
+    parser.add_argument("--bootstrap-output", type=str, default="fit_bootstrap.pkl",
+                        help="Output pickle with the bootstrap quantiles and "\
+                             "correlations")
+    parser.add_argument("--batch", type=int, default=500,
+                        help="Number of pseudo-datasets per process task")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--seed", type=int, default=123456,
+                        help="Random seed")
+
+    return parser.parse_args()
+
+def fit_nominal(x, y, yerr):
     graph = ROOT.TGraphAsymmErrors(len(x))
     for i in range(len(x)):
         graph.SetPoint(i, x[i], y[i])
@@ -18,11 +43,72 @@ def main():
     erf.SetParameter(1, 150)
     erf.SetParameter(2, 10)
     graph.Fit(erf)
-    with open("fit_results.pkl", 'w') as f:
-        p0 = erf.GetParameter(0)
-        if p0 > 1.:
-            p0 = 1.
-        pickle.dump((1, erf.GetParameter(1), erf.GetParameter(2)), f)
+    return erf.GetParameter(0), erf.GetParameter(1), erf.GetParameter(2)
+
+def pseudo_data(y, yerr, nsamples, rng):
+    # Split normal around each point: above with probability up/(up+down)
+    # using the up error, below otherwise using the down error
+    up, down = yerr[0], yerr[1]
+    above = rng.uniform(size=(nsamples, y.shape[0])) < up/np.maximum(up + down, 1e-12)
+    shift = np.abs(rng.normal(size=(nsamples, y.shape[0])))
+    return y + np.where(above, shift*up, -shift*down)
+
+def fit_bootstrap(task):
+    x, y, yerr, p0, nsamples, seed = task
+    rng = np.random.RandomState(seed)
+    params, _, _ = fit_erf(x, pseudo_data(y, yerr, nsamples, rng), yerr[1], yerr[0], p0=p0)
+    return params
+
+def bootstrap(x, y, yerr, p0, nsamples, batch, seed, nproc=None):
+    # Each task has its own seed so the result does not depend on nproc
+    tasks = [
+        (x, y, yerr, p0, min(batch, nsamples-start), seed+itask)
+        for itask, start in enumerate(range(0, nsamples, batch))
+    ]
+    pool = multiprocessing.Pool(min(nproc or multiprocessing.cpu_count(), len(tasks)))
+    params = np.concatenate(pool.map(fit_bootstrap, tasks))
+    pool.close()
+    pool.join()
+    return params
+
+def summarise(params, nominal):
+    quantiles = pd.DataFrame(
+        np.percentile(params, [2.5, 16., 50., 84., 97.5], axis=0).T,
+        index=param_names, columns=["q025", "q16", "q50", "q84", "q975"],
+    )
+    quantiles.insert(0, "nominal", nominal)
+    quantiles["std"] = params.std(axis=0)
+    correlation = pd.DataFrame(
+        np.corrcoef(params, rowvar=False), index=param_names, columns=param_names,
+    )
+    return quantiles, correlation
+
+def main():
+    options = parse_args()
+
+    with open(options.input, 'rb') as f:
+        x, y, yerr = pickle.load(f)
+    x, y, yerr = np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(yerr, dtype=float)
+
+    p0, p1, p2 = fit_nominal(x, y, yerr)
+    with open(options.output, 'wb') as f:
+        pickle.dump((1, p1, p2), f)
+
+    if options.bootstrap > 0:
+        params = bootstrap(
+            x, y, yerr, (p0, p1, p2), options.bootstrap, options.batch,
+            options.seed, options.nproc,
+        )
+        converged = np.all(np.isfinite(params), axis=1)
+        quantiles, correlation = summarise(params[converged], (p0, p1, p2))
+        print("{} of {} pseudo-datasets fitted".format(converged.sum(), params.shape[0]))
+        print(quantiles.to_string())
+        print(correlation.to_string())
+        with open(options.bootstrap_output, 'wb') as f:
+            pickle.dump({
+                "quantiles": quantiles, "correlation": correlation,
+                "params": params[converged],
+            }, f)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+import argparse
+import glob
+import os
+import numpy as np
+
+from root_reader import read_trees
+
+# Merged store of the goodness-of-fit test statistic from many combine output
+# files (e.g. one per toy seed). The limit column is kept as float32 together
+# with the seed and toy number of each entry, and the source files are recorded
+# with their mtime so new or rerun toys can be appended without reading the
+# others again. Entries of files which no longer exist are dropped. In memory
+# the store is a dict of path -> {"mtime", "limit", "seed", "toy"}.
+
+branches = ["limit", "iSeed", "iToy"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("inputs", type=str, nargs="+",
+                        help="Input ROOT files or glob patterns (quoted)")
+    parser.add_argument("-o", "--output", type=str, default="gof_toys.npz",
+                        help="Store to create or append to")
+    parser.add_argument("-j", "--nthreads", type=int, default=None,
+                        help="Number of threads reading the files")
+
+    return parser.parse_args()
+
+def store_path(path):
+    # np.savez appends .npz when missing, so load from the same name
+    if path is None or path.endswith(".npz"):
+        return path
+    return path + ".npz"
+
+def load_store(path):
+    store = {}
+    path = store_path(path)
+    if path is None or not os.path.exists(path):
+        return store
+
+    with np.load(path) as data:
+        offsets = data["file_offsets"]
+        for idx, filepath in enumerate(data["file_paths"]):
+            start, stop = offsets[idx], offsets[idx+1]
+            store[str(filepath)] = {
+                "mtime": float(data["file_mtimes"][idx]),
+                "limit": data["limit"][start:stop],
+                "seed": data["seed"][start:stop],
+                "toy": data["toy"][start:stop],
+            }
+    return store
+
+def store_arrays(store):
+    filepaths = sorted(store.keys())
+    arrays = {
+        key: np.concatenate(
+            [np.zeros(0, dtype=dtype)] + [store[p][key] for p in filepaths]
+        ) for key, dtype in [("limit", np.float32), ("seed", np.int64), ("toy", np.int64)]
+    }
+    nentries = [store[p]["limit"].shape[0] for p in filepaths]
+    arrays["file_paths"] = np.array(filepaths, dtype=str)
+    arrays["file_mtimes"] = np.array([store[p]["mtime"] for p in filepaths], dtype=float)
+    arrays["file_offsets"] = np.concatenate([[0], np.cumsum(nentries)]).astype(int)
+    return arrays
+
+def save_store(store, path):
+    np.savez(store_path(path), **store_arrays(store))
+
+def update_store(store, paths, path=None, nthreads=None):
+    removed = [filepath for filepath in store if not os.path.exists(filepath)]
+    for filepath in removed:
+        del store[filepath]
+
+    stale = []
+    for filepath in paths:
+        mtime = os.path.getmtime(filepath)
+        if filepath in store and store[filepath]["mtime"] == mtime:
+            continue
+        stale.append((filepath, mtime))
+
+    # limit is required, files without the seed or toy number get -1. Empty
+    # trees have no columns at all.
+    trees = read_trees(
+        [s[0] for s in stale], branches=branches, nthreads=nthreads,
+        optional=["iSeed", "iToy"],
+    )
+    for (filepath, mtime), (nentries, columns) in zip(stale, trees):
+        missing = np.full(nentries, -1)
+        store[filepath] = {
+            "mtime": mtime,
+            "limit": columns.get("limit", np.zeros(0)).astype(np.float32),
+            "seed": columns.get("iSeed", missing).astype(np.int64),
+            "toy": columns.get("iToy", missing).astype(np.int64),
+        }
+
+    if len(stale) + len(removed) > 0 and path is not None:
+        save_store(store, path)
+    return store
+
+def read_store(path):
+    with np.load(store_path(path)) as data:
+        return data["limit"]
+
+def main():
+    options = parse_args()
+    options.output = store_path(options.output)
+
+    paths = sorted(set(p for pattern in options.inputs for p in glob.glob(pattern)))
+    store = load_store(options.output)
+    mtimes = {p: store[p]["mtime"] for p in store}
+    store = update_store(store, paths, path=options.output, nthreads=options.nthreads)
+    nupdated = len([p for p in paths if mtimes.get(p) != store[p]["mtime"]])
+
+    arrays = store_arrays(store)
+    print("{}: {} entries from {} files ({} new or updated), {} seeds".format(
+        options.output, arrays["limit"].shape[0], len(store), nupdated,
+        np.unique(arrays["seed"]).shape[0],
+    ))
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ import os
 import re
 import uproot
 
+from result_index import load_index, update_index, get_branch
+from utils.approx_impacts import load_impacts
+
 conv_names = {
     "metTrigSF":   r'$p_{\rm{T}}^{\rm{miss}}$ trig.',
     "metTrigSyst": r'$p_{\rm{T}}^{\rm{miss}}$ trig. syst.',
@@ -151,12 +154,24 @@ def parse_args():
                         help="Output file")
     parser.add_argument("-r", "--regex", type=str, default=r'.*',
                         help="Regex string to match inputs with")
+    parser.add_argument("-m", "--mass", type=str, default="91",
+                        help="Mass in the names of the impact fits")
     parser.add_argument("--poi", type=str, default='r',
                         help="Parameter of interest")
+    parser.add_argument("--index", type=str, default=None,
+                        help="npz file used to cache the fit results between runs")
+    parser.add_argument("--approx", type=str, default=None,
+                        help="JSON with the approximate impacts from "\
+                             "impacts_parallel.py --top, drawn hatched for "\
+                             "nuisances without a full impact fit")
 
     return parser.parse_args()
 
-def get_fit_result(path, param):
+def get_fit_result(path, param, index=None):
+    if index is not None:
+        if index[path]["nentries"] == 0:
+            return np.array([1., 1., 1.])
+        return get_branch(index, path, param)
     try:
         limit = uproot.open(path)["limit"]
     except KeyError:
@@ -167,32 +182,47 @@ def get_fit_result(path, param):
         assert KeyError(path)
     return limit.array(param)
 
-def get_fit_results(poi, results_dir, initial_fit_file, regex_param_fit, regex_param):
+def get_fit_results(poi, results_dir, initial_fit_file, regex_param_fit, regex_param, index_path=None):
     names = []
     nuisances = []
     impacts = []
 
-    poi_nominal_fit = get_fit_result(initial_fit_file, poi)
+    paths, params = [], []
     for path in glob.glob(os.path.join(results_dir, "*.root")):
         match = regex_param_fit.search(os.path.basename(path))
         if match:
             param = match.group("param")
             if not regex_param.search(param):
                 continue
-            poi_fit = get_fit_result(path, poi)
-            try:
-                nuis_fit = get_fit_result(path, param)
-            except KeyError:
-                nuis_fit = [0., 0., 0.]
+            paths.append(path)
+            params.append(param)
+    if len(paths) == 0:
+        print("Warning: no impact fits in {} match {}".format(
+            results_dir, regex_param_fit.pattern,
+        ))
+
+    # Without an index path the index only lives in memory for this call
+    index = update_index(
+        load_index(index_path), [initial_fit_file]+paths, [poi]+params,
+        path=index_path,
+    )
 
-            if len(nuis_fit) != 3:
-                print(path)
+    poi_nominal_fit = get_fit_result(initial_fit_file, poi, index)
+    for path, param in zip(paths, params):
+        poi_fit = get_fit_result(path, poi, index)
+        try:
+            nuis_fit = get_fit_result(path, param, index)
+        except KeyError:
+            nuis_fit = [0., 0., 0.]
 
-            names.append(param)
-            nuisances.append(list(nuis_fit))
-            if poi_fit.shape[0]==2:
-                poi_fit = np.array(list(poi_fit)+[1/poi_fit[-1]])
-            impacts.append([poi_fit[1]-poi_fit[0], poi_fit[2]-poi_fit[0]])
+        if len(nuis_fit) != 3:
+            print(path)
+
+        names.append(param)
+        nuisances.append(list(nuis_fit))
+        if poi_fit.shape[0]==2:
+            poi_fit = np.array(list(poi_fit)+[1/poi_fit[-1]])
+        impacts.append([poi_fit[1]-poi_fit[0], poi_fit[2]-poi_fit[0]])
 
     nuisances = np.array(nuisances)
     impacts = np.array(impacts)
@@ -204,6 +234,23 @@ def get_fit_results(poi, results_dir, initial_fit_file, regex_param_fit, regex_p
 
     return names, nuisances, impacts, poi_nominal_fit
 
+def merge_approx_impacts(names, nuisances, impacts, approx_path, regex_param):
+    # Nuisances with a full impact fit keep it, the rest take the approximate
+    # values. Returns a mask of the approximated entries.
+    _, approx_names, approx_nuisances, approx_impacts, _ = load_impacts(approx_path)
+    keep = [
+        idx for idx, name in enumerate(approx_names)
+        if name not in names and regex_param.search(name)
+    ]
+
+    approx = np.array([False]*len(names) + [True]*len(keep))
+    names = list(names) + [approx_names[idx] for idx in keep]
+    nuisances = np.concatenate([nuisances.reshape(-1, 3), approx_nuisances[keep]])
+    impacts = np.concatenate([impacts.reshape(-1, 2), approx_impacts[keep]])
+
+    sort = np.argsort(np.mean(np.abs(impacts), axis=1), kind='mergesort')
+    return list(np.array(names)[sort]), nuisances[sort], impacts[sort], approx[sort]
+
 def draw_labels(axis, names):
     fontsize = 12*14./len(names)
     fontsize = max(4, min(20, fontsize))
@@ -214,24 +261,38 @@ def draw_labels(axis, names):
         axis.text(0.25, idx+0.5, name, va='center', fontsize=fontsize)
     return axis
 
-def draw_errorbar(axis, values):
+def draw_errorbar(axis, values, approx):
     nvals = values.shape[0]
     xpos = values[:,0]
     xerr = values[:,1:].T-xpos
     xerr[0,:] *= -1
+    ypos = np.linspace(0.5, nvals-0.5, nvals)
     axis.errorbar(
-        xpos, np.linspace(0.5, nvals-0.5, nvals), xerr=xerr, yerr=None,
+        xpos[~approx], ypos[~approx], xerr=xerr[:,~approx], yerr=None,
         fmt='o', color='black', markersize=4, lw=1.5, capsize=3,
         label='Pull',
     )
+    if approx.any():
+        axis.errorbar(
+            xpos[approx], ypos[approx], xerr=xerr[:,approx], yerr=None,
+            fmt='o', color='black', mfc='white', markersize=4, lw=1.5,
+            capsize=3, alpha=0.6, label='Pull (approx.)',
+        )
     return axis
 
-def draw_barhs(axis, values):
-    nvals = values.shape[0]
-    axis.barh(range(nvals), width=values[:,0], height=1, color='#80b1d3',
+def draw_barhs(axis, values, approx):
+    ypos = np.arange(values.shape[0])
+    axis.barh(ypos[~approx], width=values[~approx,0], height=1, color='#80b1d3',
               align='edge', label=r'$+1\sigma$ impact')
-    axis.barh(range(nvals), width=values[:,1], height=1, color='#fb8072',
+    axis.barh(ypos[~approx], width=values[~approx,1], height=1, color='#fb8072',
               align='edge', label=r'$-1\sigma$ impact')
+    if approx.any():
+        axis.barh(ypos[approx], width=values[approx,0], height=1, color='#80b1d3',
+                  align='edge', alpha=0.5, hatch='////', edgecolor='white', lw=0.,
+                  label=r'$+1\sigma$ impact (approx.)')
+        axis.barh(ypos[approx], width=values[approx,1], height=1, color='#fb8072',
+                  align='edge', alpha=0.5, hatch='////', edgecolor='white', lw=0.,
+                  label=r'$-1\sigma$ impact (approx.)')
     return axis
 
 def draw_odd_boxes(axis):
@@ -243,7 +304,9 @@ def draw_odd_boxes(axis):
     axis.add_collection(PatchCollection(boxes, facecolor='gray', alpha=0.25))
     return axis
 
-def draw_impacts(poi, names, nuisances, impacts, bestfit, output):
+def draw_impacts(poi, names, nuisances, impacts, bestfit, output, approx=None):
+    if approx is None:
+        approx = np.zeros(len(names), dtype=bool)
     name = conv_names.get(poi, poi.replace("_", " "))
     print("{} = {} -{} +{}".format(name,
                                    bestfit[0],
@@ -257,7 +320,9 @@ def draw_impacts(poi, names, nuisances, impacts, bestfit, output):
         "up_const": nuisances[:,2],
     }, columns=["nuisance", "down_impact [%]", "up_impact [%]", "down_const", "up_const"])
     df = df.set_index("nuisance")
-    print(100.*df/bestfit[0])
+    df = 100.*df/bestfit[0]
+    df["approx"] = approx
+    print(df)
 
     nnuis = nuisances.shape[0]
 
@@ -278,13 +343,13 @@ def draw_impacts(poi, names, nuisances, impacts, bestfit, output):
     draw_labels(axl, names)
 
     # Middle axis
-    draw_errorbar(axm, nuisances)
+    draw_errorbar(axm, nuisances, approx)
     axm.set_xlim((-2.9, 2.9))
     #axm.set_xlim(-1, 1)
     axm.set_xlabel(r'$(\hat{\theta}-\theta_0)/\Delta\theta$', fontsize='large')
 
     # Right axis
-    draw_barhs(axr, impacts)
+    draw_barhs(axr, impacts, approx)
     xmax = np.abs(axr.get_xlim()).max()
     axr.set_xlim((-xmax, xmax))
     axr.set_xlabel(conv_names.get("dhat_"+poi, poi), fontsize='large')
@@ -338,7 +403,9 @@ def main():
     options = parse_args()
     poi_name = options.poi
 
-    regex_param_fit = re.compile("higgsCombine_paramFit_{}_(?P<param>[^.]*)\.MultiDimFit\.mH91\.root".format(options.name))
+    regex_param_fit = re.compile("higgsCombine_paramFit_{}_(?P<param>[^.]*)\.MultiDimFit\.mH{}\.root".format(
+        re.escape(options.name), re.escape(options.mass),
+    ))
     regex_param = re.compile(options.regex)
 
     names, nuisances, impacts, bestfit = get_fit_results(
@@ -347,8 +414,15 @@ def main():
         options.initial_fit,
         regex_param_fit,
         regex_param,
+        index_path=options.index,
     )
-    draw_impacts(poi_name, names, nuisances, impacts, bestfit, options.output)
+    approx = None
+    if options.approx is not None:
+        names, nuisances, impacts, approx = merge_approx_impacts(
+            names, nuisances, impacts, options.approx, regex_param,
+        )
+    draw_impacts(poi_name, names, nuisances, impacts, bestfit, options.output,
+                 approx=approx)
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,7 @@ import pandas as pd
 import re
 
 from impacts import get_fit_result
+from result_index import load_index, update_index
 
 nuis_col = {
     "r":         "black",
@@ -46,6 +47,8 @@ def parse_args():
                         help="Output file")
     parser.add_argument("--poi", type=str, default='r',
                         help="Parameter of interest")
+    parser.add_argument("--index", type=str, default=None,
+                        help="npz file used to cache the fit results between runs")
 
     return parser.parse_args()
 
@@ -109,7 +112,7 @@ def main():
     regex_param_fit = re.compile("higgsCombineNuisFit.*{}_(?P<param>[^_^.]*)\.MultiDimFit\.mH120\.root".format(options.name))
     regex_bins = re.compile("METnoX-(?P<bin>[0-9]+)ToInf")
 
-    data = []
+    matches = []
     for path in glob.glob(options.results_dir):
         match = regex_bins.search(path)
         if not match:
@@ -126,8 +129,17 @@ def main():
 
         if not match_nuis and not match_poi:
             continue
+        matches.append((path, bin, param))
+
+    index = update_index(
+        load_index(options.index),
+        [m[0] for m in matches], [m[2] for m in matches],
+        path=options.index,
+    )
 
-        fit_result = get_fit_result(path, poi_name)
+    data = []
+    for path, bin, param in matches:
+        fit_result = get_fit_result(path, poi_name, index)
         data.append({
             "bin": int(bin),
             "parameter": param,
@@ -5,6 +5,8 @@ import pandas as pd
 import seaborn as sns
 import uproot
 
+from result_index import load_index, update_index, get_branch
+
 conv_names = {
     "r":                  r'$r$',
     "r_ggH":              r'$r_{gg\rm{H}}$',
@@ -73,6 +75,8 @@ def parse_args():
                         help="Space delimited nuisance list")
     parser.add_argument("-o", "--output", type=str, default="ll1dscan.pdf",
                         help="Output file")
+    parser.add_argument("--index", type=str, default=None,
+                        help="npz file used to cache the scan between runs")
 
     return parser.parse_args()
 
@@ -85,9 +89,18 @@ def main():
         nuisances = options.nuisances.split()
 
         # expected
-        rfile_exp = uproot.open(options.scan_exp)
-        scan_exp = rfile_exp["limit"]
-        arrays_exp = scan_exp.arrays(nuisances+["deltaNLL", poi])
+        if options.index is not None:
+            index = update_index(
+                load_index(options.index), [options.scan_exp], path=options.index,
+            )
+            arrays_exp = {
+                b: get_branch(index, options.scan_exp, b)
+                for b in nuisances+["deltaNLL", poi]
+            }
+        else:
+            rfile_exp = uproot.open(options.scan_exp)
+            scan_exp = rfile_exp["limit"]
+            arrays_exp = scan_exp.arrays(nuisances+["deltaNLL", poi])
         poi_exp = arrays_exp[poi][1:]
 
         df = pd.DataFrame(arrays_exp)
@@ -2,6 +2,7 @@ import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 from scipy.interpolate import griddata
+from scipy.ndimage import binary_dilation
 import uproot
 
 def parse_args():
@@ -12,16 +13,19 @@ def parse_args():
     parser.add_argument("singles", type=str,
                         help="Input ROOT file with the best fit values")
     parser.add_argument("--onesigma", type=str, default=None,
-                        help="Input ROOT file with the 68% contour")
+                        help="Input ROOT file with the 68% contour (default: "\
+                             "q = 2.30 contour of the scan)")
     parser.add_argument("--twosigma", type=str, default=None,
-                        help="Input ROOT file with the 95% contour")
+                        help="Input ROOT file with the 95% contour (default: "\
+                             "q = 5.99 contour of the scan)")
     parser.add_argument("--xpoi", type=str, default="rz_ll",
                         help="Name of the x-axis poi")
     parser.add_argument("--ypoi", type=str, default="rz_nunu",
                         help="Name of the y-axis poi")
     parser.add_argument("-n", "--nbins", type=int, default=100,
                         help="Number of points scanned across in each "\
-                             "dimension")
+                             "dimension, or the number of bins in each "\
+                             "dimension for an adaptive scan")
     parser.add_argument("--xrange", default="0.5,1.5", help="X-axis range")
     parser.add_argument("--yrange", default="0.5,1.5", help="Y-axis range")
     parser.add_argument("-o", "--outpath", type=str, default="ll2dscan.pdf",
@@ -53,23 +57,32 @@ def process_scans(path, xpoi, ypoi):
     )
     return xpoi_vals, ypoi_vals, 2.*nll_vals
 
-def interpolate(xscan, yscan, zscan, xrange, yrange, nbins):
+def grid_scan(xscan, yscan, zscan):
+    # Place the scan points on the grid spanned by the unique scanned values.
+    # Cells without a point are NaN.
     x = np.unique(xscan)
     y = np.unique(yscan)
     X, Y = np.meshgrid(x, y)
+    Z = np.full(X.shape, np.nan)
+    Z[np.searchsorted(y, yscan), np.searchsorted(x, xscan)] = zscan
+    return X, Y, Z
+
+def fill_missing(X, Y, Z):
+    # Linear interpolation into the missing cells, triangulating only the
+    # points in a band around them rather than the full grid
+    missing = np.isnan(Z)
+    if not missing.any():
+        return Z
+    near = binary_dilation(missing, iterations=1) & ~missing
+    Z = Z.copy()
+    Z[missing] = griddata(
+        (X[near], Y[near]), Z[near], (X[missing], Y[missing]), method='linear',
+    )
+    return Z
 
-    z_ix = np.vectorize({v: k for k, v in enumerate(x)}.get)(xscan)
-    z_iy = np.vectorize({v: k for k, v in enumerate(y)}.get)(yscan)
-    Z = -1*np.ones_like(X)
-    for idx, (ix, iy) in enumerate(zip(z_ix, z_iy)):
-        Z[iy, ix] = zscan[idx]
-    Z[Z<0.] = np.nan
-
-    Z = np.ma.masked_invalid(Z)
-    X1 = X[~Z.mask]
-    Y1 = Y[~Z.mask]
-    Z1 = Z[~Z.mask]
-    gd1 = griddata((X1, Y1), Z1.ravel(), (X, Y), method='linear')
+def interpolate(xscan, yscan, zscan, xrange, yrange, nbins):
+    X, Y, Z = grid_scan(xscan, yscan, zscan)
+    gd1 = fill_missing(X, Y, Z)
 
     X = X.ravel()
     Y = Y.ravel()
@@ -77,10 +90,46 @@ def interpolate(xscan, yscan, zscan, xrange, yrange, nbins):
     Y_new = Y[(xrange[0] < X) & (X < xrange[1]) & (yrange[0] < Y) & (Y < yrange[1])]
     W_new = gd1.ravel()[(xrange[0] < X) & (X < xrange[1]) & (yrange[0] < Y) & (Y < yrange[1])]
 
-    nbinsx = (xrange[1] - xrange[0]) / (X.max() - X.min()) * nbins
-    nbinsy = (yrange[1] - yrange[0]) / (Y.max() - Y.min()) * nbins
+    nbinsx = int(round((xrange[1] - xrange[0]) / (X.max() - X.min()) * nbins))
+    nbinsy = int(round((yrange[1] - yrange[0]) / (Y.max() - Y.min()) * nbins))
     return X_new, Y_new, W_new, nbinsx, nbinsy
 
+def is_regular(xscan, yscan):
+    # Uniform grids fill (almost) every combination of the scanned values,
+    # adaptive scans only a small fraction of the finest lattice
+    nx = np.unique(xscan).shape[0]
+    ny = np.unique(yscan).shape[0]
+    return xscan.shape[0] > 0.5*nx*ny
+
+def interpolate_scattered(xscan, yscan, zscan, xrange, yrange, nbins):
+    # Linear interpolation of a non-uniform point cloud onto the bin centres of
+    # a regular nbins x nbins grid over the drawn range
+    xedges = np.linspace(xrange[0], xrange[1], nbins+1)
+    yedges = np.linspace(yrange[0], yrange[1], nbins+1)
+    X, Y = np.meshgrid(
+        0.5*(xedges[1:] + xedges[:-1]), 0.5*(yedges[1:] + yedges[:-1]),
+    )
+    W = griddata((xscan, yscan), zscan, (X, Y), method='linear')
+    return X.ravel(), Y.ravel(), W.ravel(), xedges, yedges
+
+def grid_contours(x, y, w, level):
+    # Marching squares on the interpolated q surface. Returns a list of (N, 2)
+    # segments so disjoint and non-convex contours are kept as they are.
+    X, Y, Z = grid_scan(x, y, w)
+    fig, ax = plt.subplots()
+    cs = ax.contour(X, Y, np.ma.masked_invalid(Z), levels=[level])
+    segments = [np.asarray(seg) for seg in cs.allsegs[0] if len(seg) > 1]
+    plt.close(fig)
+    return segments
+
+def file_contours(path, xpoi, ypoi, xbf, ybf):
+    # Points from a --algo contour2d fit, ordered in angle around the best fit
+    xcont, ycont, _ = process_scans(path, xpoi, ypoi)
+    xcont, ycont = sort_phi(xcont, ycont, xbf, ybf)
+    xcont = np.array(list(xcont)+[xcont[0]])
+    ycont = np.array(list(ycont)+[ycont[0]])
+    return [np.column_stack((xcont, ycont))]
+
 def main():
     options = parse_args()
 
@@ -96,34 +145,34 @@ def main():
     zscan = zscan[zscan>0.]
     zscan[zscan>10.] = 10.
 
-    X_new, Y_new, W_new, nbinsx, nbinsy = interpolate(
-        xscan, yscan, zscan, xrange, yrange, options.nbins,
-    )
+    if is_regular(xscan, yscan):
+        X_new, Y_new, W_new, nbinsx, nbinsy = interpolate(
+            xscan, yscan, zscan, xrange, yrange, options.nbins,
+        )
+    else:
+        X_new, Y_new, W_new, nbinsx, nbinsy = interpolate_scattered(
+            xscan, yscan, zscan, xrange, yrange, options.nbins,
+        )
 
-    xcont_one, ycont_one = None, None
     if options.onesigma:
-        xcont_one, ycont_one, _ = process_scans(options.onesigma, xpoi, ypoi)
-        xcont_one, ycont_one = sort_phi(xcont_one, ycont_one, xbf, ybf)
-        xcont_one = np.array(list(xcont_one)+[xcont_one[0]])
-        ycont_one = np.array(list(ycont_one)+[ycont_one[0]])
+        cont_one = file_contours(options.onesigma, xpoi, ypoi, xbf, ybf)
+    else:
+        cont_one = grid_contours(X_new, Y_new, W_new, 2.30)
 
-    xcont_two, ycont_two = None, None
     if options.twosigma:
-        xcont_two, ycont_two, _ = process_scans(options.twosigma, xpoi, ypoi)
-        xcont_two, ycont_two = sort_phi(xcont_two, ycont_two, xbf, ybf)
-        xcont_two = np.array(list(xcont_two)+[xcont_two[0]])
-        ycont_two = np.array(list(ycont_two)+[ycont_two[0]])
+        cont_two = file_contours(options.twosigma, xpoi, ypoi, xbf, ybf)
+    else:
+        cont_two = grid_contours(X_new, Y_new, W_new, 5.99)
 
     draw(
         X_new, Y_new, W_new,
-        xcont_one, ycont_one,
-        xcont_two, ycont_two,
+        cont_one, cont_two,
         xbf, ybf,
         nbinsx, nbinsy,
         outpath = options.outpath,
     )
 
-def draw(x, y, w, xc1, yc1, xc2, yc2, xbf, ybf, nx, ny,
+def draw(x, y, w, cont1, cont2, xbf, ybf, nx, ny,
          xlab=r'$r_{\mu\mu}$', ylab=r'$r_{\nu\nu}$', outpath="ll2dscan.pdf"):
     fig, ax = plt.subplots(figsize=(5.4, 4.8))
 
@@ -143,10 +192,12 @@ def draw(x, y, w, xc1, yc1, xc2, yc2, xbf, ybf, nx, ny,
         ax.plot(xbf, ybf, marker='*', color='red', label="Best fit", lw=0.)
     ax.plot(1, 1, marker='P', color='black', label="SM", lw=0.)
 
-    if xc1 is not None and yc1 is not None:
-        ax.plot(xc1, yc1, label='68\% CL', lw=1.2, color='black')
-    if xc2 is not None and yc2 is not None:
-        ax.plot(xc2, yc2, label='95\% CL', lw=1.2, ls='--', color='black')
+    for idx, seg in enumerate(cont1):
+        ax.plot(seg[:,0], seg[:,1], label='68\% CL' if idx == 0 else None,
+                lw=1.2, color='black')
+    for idx, seg in enumerate(cont2):
+        ax.plot(seg[:,0], seg[:,1], label='95\% CL' if idx == 0 else None,
+                lw=1.2, ls='--', color='black')
 
     args = ax.get_legend_handles_labels()
     kwargs = {"fontsize": 12, "framealpha": 0.8, "labelspacing": 0.25}
@@ -3,6 +3,7 @@ import pandas as pd
 import autograd.numpy as np
 import matplotlib.pyplot as plt
 import argparse
+import multiprocessing
 from scipy.optimize import curve_fit
 from scipy.stats import t
 from scipy.special import gammaincinv
@@ -14,42 +15,64 @@ def parse_args():
     parser.add_argument("input", help="Input file")
     parser.add_argument("-o", "--output", default="fit.pdf", help="Output file")
     parser.add_argument("-b", "--binning", default="[200]", help="List of bins")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of processes for the fits and for the "\
+                             "figures (default: number of CPUs)")
     return parser.parse_args()
 
-def get_fit(func, xs, fitrange, ys, confprob, **curve_fit_kwargs):
+def const(x, p0):
+    return p0*np.ones_like(x)
+
+def linear(x, p0, p1):
+    return p0 + x*p1
+
+def band_factor(confprob, ndof=None):
+    # Two-sided width in units of the propagated error: the Student-t quantile
+    # when the number of degrees of freedom is given, otherwise the Gaussian
+    # one, sqrt(2*gammaincinv(0.5, p)) = norm.ppf(0.5 + p/2). The previous
+    # 2*gammaincinv(0.5, 0.68) is the chi2(1) quantile (0.989), so bands at
+    # 0.68 are now 0.5% wider (0.994).
+    if ndof is not None:
+        return t.ppf(1.0 - (1.0 - confprob)/2., ndof)
+    return np.sqrt(2.*gammaincinv(0.5, confprob))
+
+def get_bands(dfdp, pcov, confprobs, ndof=None):
+    # Propagate the covariance through the jacobian (npoints, nparams) for all
+    # points at once, then scale the width for each confidence level
+    df = np.sqrt(np.einsum('ij,jk,ik->i', dfdp, pcov, dfdp))
+    return [band_factor(confprob, ndof)*df for confprob in confprobs]
+
+def get_fit_bands(func, xs, fitrange, ys, confprobs, npoints=1001, studentt=False,
+                  **curve_fit_kwargs):
     # least squares curve fit with errors on y
     if "absolute_sigma" not in curve_fit_kwargs:
         curve_fit_kwargs["absolute_sigma"] = True
     popt, pcov = curve_fit(func, xs, ys, **curve_fit_kwargs)
-    x = np.linspace(fitrange[0], fitrange[1], 1001)
-
-    norm = False
-    if norm:
-        alpha = 1.0 - confprob
-        prb = 1.0 - alpha/2.
-        corr_factor = t.ppf(prb, ys.shape[0]-popt.shape[0])
-    else:
-        corr_factor = 2.*gammaincinv(0.5, 0.68)
+    x = np.linspace(fitrange[0], fitrange[1], npoints)
 
     func2 = lambda xcare, pcare: func(xcare, *pcare)
     dfdp = jacobian(func2, argnum=1)(x, popt)
-    if popt.shape[0]>1:
-        df = np.sqrt(np.array([
-            np.dot(dfdp[i,:], np.matmul(pcov, dfdp.T)[:,i])
-            for i in range(x.shape[0])
-        ]))
-    else:
-        df = dfdp[0]*np.sqrt(pcov[0,0])
+
+    # Student-t widths with the fit's degrees of freedom if requested
+    ndof = ys.shape[0] - popt.shape[0] if studentt else None
 
     y = func(x, *popt)
-    delta  = corr_factor * df
-    return x, y, delta
+    return x, y, get_bands(dfdp, pcov, confprobs, ndof)
+
+def get_fit(func, xs, fitrange, ys, confprob, **curve_fit_kwargs):
+    x, y, deltas = get_fit_bands(func, xs, fitrange, ys, [confprob], **curve_fit_kwargs)
+    return x, y, deltas[0]
 
 def get_hist(pathname):
     filename, histname = pathname.split(":")
+    return get_hists(filename, [histname])[histname]
+
+def get_hists(filename, histnames):
+    # Open the file once for all of the histograms
     with uproot.open(filename) as f:
-        hist = f[histname].pandas()
+        return {histname: hist_arrays(f[histname].pandas()) for histname in histnames}
 
+def hist_arrays(hist):
     xlow = np.array([x.left for x in hist.index.values])
     xhigh = np.array([x.right for x in hist.index.values])
     count = hist["count"].values
@@ -115,6 +138,7 @@ def draw(xpoints, xpoints_err, ypoints, ypoints_err, xs, ys_const, ys_linear, er
 
     fig.savefig(output, format="pdf", bbox_inches="tight")
     print("Created {}".format(output))
+    plt.close(fig)
 
 def draw_full(xs, ycons, errcons, ylins, errlins, output):
     fig, (axtop, axbot) = plt.subplots(
@@ -171,15 +195,19 @@ def draw_full(xs, ycons, errcons, ylins, errlins, output):
         columns=["x", "qcd_syst", "qcd_syst_bin"],
     )
 
-def process(input, output):
-    xlow, xhigh, data, _ = get_hist("{}:monojetqcd/data_obs".format(input))
-    _, _, signal, signal_err = get_hist("{}:monojetqcd/qcd".format(input))
-    _, _, wlnu, wlnu_err = get_hist("{}:monojetqcd/wlnu_qcd".format(input))
-    _, _, bkg, bkg_err = get_hist("{}:monojetqcd/bkg".format(input))
+def fit_bin(input):
+    hists = get_hists(input, [
+        "monojetqcd/data_obs", "monojetqcd/qcd", "monojetqcd/wlnu_qcd",
+        "monojetqcd/bkg",
+    ])
+    xlow, xhigh, data, _ = hists["monojetqcd/data_obs"]
+    _, _, signal, signal_err = hists["monojetqcd/qcd"]
+    _, _, wlnu, wlnu_err = hists["monojetqcd/wlnu_qcd"]
+    _, _, bkg, bkg_err = hists["monojetqcd/bkg"]
 
     print(signal**2/signal_err**2)
 
-    bkg += wlnu
+    bkg = bkg + wlnu
     bkg_err = np.sqrt(bkg_err**2 + wlnu_err**2)
 
     bins = np.array(list(xlow)+[xhigh[-1]])
@@ -187,27 +215,66 @@ def process(input, output):
     ys = (data - bkg) / signal
     ys_err = ys*np.sqrt((data+bkg_err**2)/(data-bkg)**2 + signal_err**2/signal**2)
 
-    def const(x, p0):
-        return p0*np.ones_like(x)
-    def linear(x, p0, p1):
-        return p0 + x*p1
-
     x, ycon, errcon = get_fit(const, xs, (0., 1000.), ys, 0.68, sigma=ys_err)
     _, ylin, errlin = get_fit(linear, xs, (0., 1000.), ys, 0.68, sigma=ys_err)
+    return (xs, bins[1:]-xs, ys, ys_err, x, ycon, ylin, errcon, errlin)
+
+def setup_style():
+    # Shared by every rendering process
+    plt.switch_backend("Agg")
 
-    draw(xs, bins[1:]-xs, ys, ys_err, x, ycon, ylin, errcon, errlin, output)
-    return ycon, errcon, ylin, errlin
+def render(task):
+    fit, output = task
+    draw(*(fit + (output,)))
+    return output
+
+def process(input, output):
+    fit = fit_bin(input)
+    render((fit, output))
+    return fit[5], fit[7], fit[6], fit[8]
+
+def process_bins(inputs, outputs, nproc=None):
+    # Fits fan out over one pool and each finished fit is handed to a second
+    # pool for drawing, so rendering overlaps with the remaining fits
+    nproc = min(nproc or multiprocessing.cpu_count(), len(inputs))
+    if nproc <= 1:
+        setup_style()
+        return [process(input, output) for input, output in zip(inputs, outputs)]
+
+    fit_pool = multiprocessing.Pool(nproc)
+    render_pool = multiprocessing.Pool(nproc, initializer=setup_style)
+    results, renders = [], []
+    try:
+        for fit, output in zip(fit_pool.imap(fit_bin, inputs), outputs):
+            results.append((fit[5], fit[7], fit[6], fit[8]))
+            renders.append(render_pool.apply_async(render, ((fit, output),)))
+        for r in renders:
+            r.get()
+        fit_pool.close()
+        render_pool.close()
+    except (Exception, KeyboardInterrupt):
+        fit_pool.terminate()
+        render_pool.terminate()
+        raise
+    finally:
+        fit_pool.join()
+        render_pool.join()
+    return results
 
 def main():
     options = parse_args()
     xs = []
     ycons, errcons = [], []
     ylins, errlins = [], []
-    for bin in eval(options.binning):
+    binning = eval(options.binning)
+    results = process_bins(
+        [options.input.format(bin) for bin in binning],
+        [options.output.format(bin) for bin in binning],
+        options.nproc,
+    )
+    for bin, result in zip(binning, results):
         xs.append(float(bin))
-        input = options.input.format(bin)
-        output = options.output.format(bin)
-        ycon, errcon, ylin, errlin = [p[0] for p in process(input, output)]
+        ycon, errcon, ylin, errlin = [p[0] for p in result]
         ycons.append(ycon)
         errcons.append(errcon)
         ylins.append(ylin)
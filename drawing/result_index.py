@@ -0,0 +1,88 @@
+import os
+import numpy as np
+
+from root_reader import read_trees
+
+# Columnar cache of the limit trees of many combine output files. Each file is
+# opened once and all of its branches are stored in an npz file together with
+# the file mtime and a key (e.g. the nuisance name), so later updates only
+# reread files which are new or have changed on disk. In memory the index is a
+# dict of path -> {"key", "mtime", "nentries", "columns"}.
+
+def load_index(path):
+    index = {}
+    if path is None or not os.path.exists(path):
+        return index
+
+    with np.load(path) as data:
+        offsets = data["file_offsets"]
+        branches = [k[len("branch_"):] for k in data.files if k.startswith("branch_")]
+        columns = {b: data["branch_"+b] for b in branches}
+        for idx, filepath in enumerate(data["file_paths"]):
+            start, stop = offsets[idx], offsets[idx+1]
+            index[str(filepath)] = {
+                "key": str(data["file_keys"][idx]),
+                "mtime": float(data["file_mtimes"][idx]),
+                "nentries": int(stop - start),
+                # branches missing from a file are stored as NaN
+                "columns": {
+                    b: columns[b][start:stop] for b in branches
+                    if stop > start and not np.all(np.isnan(columns[b][start:stop]))
+                },
+            }
+    return index
+
+def save_index(index, path):
+    filepaths = sorted(index.keys())
+    branches = sorted(set(
+        b for p in filepaths for b in index[p]["columns"].keys()
+    ))
+    nentries = [index[p]["nentries"] for p in filepaths]
+    offsets = np.concatenate([[0], np.cumsum(nentries)]).astype(int)
+
+    arrays = {
+        "file_paths": np.array(filepaths, dtype=str),
+        "file_keys": np.array([index[p]["key"] for p in filepaths], dtype=str),
+        "file_mtimes": np.array([index[p]["mtime"] for p in filepaths], dtype=float),
+        "file_offsets": offsets,
+    }
+    for branch in branches:
+        column = np.full(offsets[-1], np.nan)
+        for idx, filepath in enumerate(filepaths):
+            if branch in index[filepath]["columns"]:
+                column[offsets[idx]:offsets[idx+1]] = index[filepath]["columns"][branch]
+        arrays["branch_"+branch] = column
+    np.savez_compressed(path, **arrays)
+
+def update_index(index, paths, keys=None, path=None, nthreads=None):
+    if keys is None:
+        keys = [os.path.basename(p) for p in paths]
+
+    stale = []
+    for filepath, key in zip(paths, keys):
+        mtime = os.path.getmtime(filepath)
+        if filepath in index and index[filepath]["mtime"] == mtime:
+            continue
+        stale.append((filepath, key, mtime))
+
+    trees = read_trees([s[0] for s in stale], nthreads=nthreads)
+    for (filepath, key, mtime), (nentries, columns) in zip(stale, trees):
+        index[filepath] = {
+            "key": key, "mtime": mtime, "nentries": nentries, "columns": columns,
+        }
+    changed = len(stale) > 0
+
+    for filepath in list(index.keys()):
+        if not os.path.exists(filepath):
+            del index[filepath]
+            changed = True
+
+    if changed and path is not None:
+        save_index(index, path)
+    return index
+
+def get_branch(index, path, branch):
+    columns = index[path]["columns"]
+    if branch not in columns:
+        raise KeyError(path)
+    return columns[branch]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import uproot
+from concurrent.futures import ThreadPoolExecutor
+
+# Reading many small trees is dominated by the per-file latency of the shared
+# filesystem. uproot releases the GIL while decompressing, so the opens and
+# branch reads are overlapped on a thread pool. Results keep the input order.
+
+def read_tree(path, branches=None, treename="limit", optional=()):
+    # Missing branches raise a KeyError unless they are in optional
+    tree = uproot.open(path)[treename]
+    nentries = tree.numentries
+    if nentries == 0:
+        return nentries, {}
+    if branches is None:
+        columns = tree.arrays(namedecode="utf-8")
+    else:
+        available = [k.decode("utf-8") if isinstance(k, bytes) else k for k in tree.keys()]
+        missing = [b for b in branches if b not in available and b not in optional]
+        if len(missing) > 0:
+            raise KeyError("{} has no branch {}".format(path, ", ".join(missing)))
+        columns = tree.arrays([b for b in branches if b in available], namedecode="utf-8")
+    return nentries, {b: np.asarray(a, dtype=float) for b, a in columns.items()}
+
+def read_trees(paths, branches=None, treename="limit", nthreads=None, optional=()):
+    with ThreadPoolExecutor(max_workers=nthreads) as executor:
+        return list(executor.map(
+            lambda p: read_tree(p, branches, treename, optional), paths,
+        ))
+
+def read_limit_trees(paths, branches=None, treename="limit", nthreads=None):
+    # One row per tree entry with the source path and entry number. Empty
+    # trees contribute no rows.
+    frames = []
+    for path, (nentries, columns) in zip(paths, read_trees(paths, branches, treename, nthreads)):
+        if nentries == 0:
+            continue
+        frame = pd.DataFrame(columns, index=np.arange(nentries))
+        frame.insert(0, "entry", np.arange(nentries))
+        frame.insert(0, "path", path)
+        frames.append(frame)
+    if len(frames) == 0:
+        return pd.DataFrame(columns=["path", "entry"] + list(branches or []))
+    return pd.concat(frames, ignore_index=True, sort=False)
@@ -0,0 +1,70 @@
+import numpy as np
+import uproot
+from collections import namedtuple
+
+# Lazy walk over a shapes file laid out as region/process for the nominal
+# templates (as written by PostFitShapesFromWorkspace) and
+# region/<syst>Up/process, region/<syst>Down/process for the variations.
+# Histograms are only read once they pass the optional select function, which
+# is called as select(region, process, systematic, variation), and are yielded
+# one at a time so memory does not grow with the number of systematics.
+
+ShapeHist = namedtuple("ShapeHist", [
+    "region", "process", "systematic", "variation", "edges", "values", "variances",
+])
+
+def _decode(name):
+    if isinstance(name, bytes):
+        name = name.decode("utf-8")
+    return name.split(";")[0]
+
+def _iter_classnames(directory):
+    for name, classname in directory.iterclassnames():
+        yield _decode(name), _decode(classname)
+
+def _is_directory(classname):
+    return classname.startswith("TDirectory")
+
+def _is_hist(classname):
+    return classname.startswith("TH1")
+
+def split_variation(name):
+    if name.endswith("Up"):
+        return name[:-len("Up")], "up"
+    if name.endswith("Down"):
+        return name[:-len("Down")], "down"
+    return None, None
+
+def _read(region, process, systematic, variation, hist):
+    return ShapeHist(
+        region, process, systematic, variation,
+        np.asarray(hist.edges, dtype=float),
+        np.asarray(hist.values, dtype=float),
+        np.asarray(hist.variances, dtype=float),
+    )
+
+def iter_shapes(path, select=None):
+    if select is None:
+        select = lambda region, process, systematic, variation: True
+
+    with uproot.open(path) as f:
+        for region, classname in _iter_classnames(f):
+            if not _is_directory(classname):
+                continue
+            directory = f[region]
+
+            for name, classname in _iter_classnames(directory):
+                if _is_hist(classname):
+                    if select(region, name, "nominal", None):
+                        yield _read(region, name, "nominal", None, directory[name])
+                    continue
+
+                if not _is_directory(classname):
+                    continue
+                systematic, variation = split_variation(name)
+                if systematic is None:
+                    continue
+                subdirectory = directory[name]
+                for process, subclassname in _iter_classnames(subdirectory):
+                    if _is_hist(subclassname) and select(region, process, systematic, variation):
+                        yield _read(region, process, systematic, variation, subdirectory[process])
@@ -2,13 +2,12 @@ import argparse
 import glob
 import os
 import re
-import uproot
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from scipy.special import erf
-from scipy.optimize import curve_fit
+from erf_fit import erf_func, fit_erf, erf_bands, fit_table
+from root_reader import read_limit_trees
 
 try:
     import cPickle as pickle
@@ -28,48 +27,81 @@ def parse_args():
                         help="Dict map for labels")
     parser.add_argument("--fitparams", type=str, default=None,
                         help="Input pickle with fit parameters")
+    parser.add_argument("--manifest", type=str, default=None,
+                        help="Pickle with the values already extracted from "\
+                             "each file. Only new or changed files are read "\
+                             "and the manifest is updated.")
     parser.add_argument("-o", "--output", type=str, default="trigger_efficiency",
                         help="Output file")
 
     return parser.parse_args()
 
-def erf_func(x, a, b, c):
-    return a*0.5*(1 + erf((x-b)/(np.sqrt(2)*c)))
+# The manifest maps each matched file to its size, mtime, the bin edges taken
+# from the regex and the (best fit, up, down) values of each POI, so a rerun
+# only reads files which are new or have changed on disk.
 
-def get_trigger_efficiencies(inputdir, regex_string, pois):
+def load_manifest(path):
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def save_manifest(manifest, path):
+    with open(path, 'wb') as f:
+        pickle.dump(manifest, f)
+
+def update_manifest(manifest, inputdir, regex_string, pois):
     regex = re.compile(regex_string)
 
-    results = []
+    matches = {}
     for path in glob.glob(os.path.join(inputdir, "*")):
         match = regex.search(path)
         if not match:
             continue
-        xrange = list(match.groups())
-        if xrange[0] == "Inf":
-            xrange[0] = -np.inf
-        if xrange[-1] == "Inf":
-            xrange[-1] = np.inf
-        xrange = map(float, match.groups())
-        print(path)
-        f = uproot.open(path)
-        t = f["limit"]
-        if t.numentries == 0:
+        matches[path] = list(map(float, match.groups()))
+
+    stale = []
+    for path, xrange in matches.items():
+        stat = os.stat(path)
+        entry = manifest.get(path)
+        if entry is not None and entry["size"] == stat.st_size\
+           and entry["mtime"] == stat.st_mtime and entry["xrange"] == xrange\
+           and (entry["values"] is None or all(poi in entry["values"] for poi in pois)):
             continue
-        results_pois = t.arrays(pois, outputtype=tuple)
+        print(path)
+        stale.append(path)
+        manifest[path] = {
+            "size": stat.st_size, "mtime": stat.st_mtime, "xrange": xrange,
+            "values": None,
+        }
 
-        if results_pois[0].shape[0] == 0:
+    trees = read_limit_trees(stale, pois)
+    for path, tree in trees.groupby("path", sort=False):
+        manifest[path]["values"] = {
+            poi: (
+                tree[poi].values[0], # best fit
+                tree[poi].values.max(), # up
+                tree[poi].values.min(), # down
+            ) for poi in pois
+        }
+
+    removed = [path for path in manifest if path not in matches]
+    for path in removed:
+        del manifest[path]
+    return manifest, len(stale) + len(removed)
+
+def manifest_dataframe(manifest, pois):
+    results = []
+    for path, entry in manifest.items():
+        if entry["values"] is None:
             continue
 
         result = {
-            "xlow": xrange[0],
-            "xupp": xrange[1],
+            "xlow": entry["xrange"][0],
+            "xupp": entry["xrange"][1],
         }
-        for results_poi, poi in zip(results_pois, pois):
-            up = results_poi.max()
-            down = results_poi.min()
-            result[poi] = results_poi[0] # best fit
-            result[poi+"_up"] = results_poi.max() # up
-            result[poi+"_down"] = results_poi.min() # down
+        for poi in pois:
+            result[poi], result[poi+"_up"], result[poi+"_down"] = entry["values"][poi]
         results.append(result)
     if len(results)==0:
         return None
@@ -79,6 +111,14 @@ def get_trigger_efficiencies(inputdir, regex_string, pois):
             .dropna()
     return df
 
+def get_trigger_efficiencies(inputdir, regex_string, pois, manifest_path=None):
+    manifest, nchanged = update_manifest(
+        load_manifest(manifest_path), inputdir, regex_string, pois,
+    )
+    if manifest_path is not None and nchanged > 0:
+        save_manifest(manifest, manifest_path)
+    return manifest_dataframe(manifest, pois)
+
 def draw_efficiencies(df, pois, output, label_map, fit_params):
     df = df.iloc[:-1]
     print(df)
@@ -86,10 +126,30 @@ def draw_efficiencies(df, pois, output, label_map, fit_params):
         df.loc[:,poi+"_up"] = df.eval("{0}_up - {0}".format(poi))
         df.loc[:,poi+"_down"] = df.eval("{0} - {0}_down".format(poi))
 
-        bin_low = df.index.get_level_values("xlow").values
-        bin_upp = df.index.get_level_values("xupp").values
-        bin_cent = (bin_low + bin_upp)/2
-
+    bin_low = df.index.get_level_values("xlow").values
+    bin_upp = df.index.get_level_values("xupp").values
+    bin_cent = (bin_low + bin_upp)/2
+
+    # Fit all POIs together with their asymmetric errors
+    popts, pcovs, _ = fit_erf(
+        bin_cent,
+        df[pois].values.T,
+        df[[poi+"_down" for poi in pois]].values.T,
+        df[[poi+"_up" for poi in pois]].values.T,
+        p0=(1, 100, 50),
+        weights=(bin_cent>=150),
+    )
+    print(fit_table(pois, popts, pcovs))
+
+    #z = np.linspace(bin_low.min(), bin_upp.max(), 1000)
+    z = np.linspace(100, bin_upp.max(), 1000)
+    bands = erf_bands(z, popts, pcovs)
+
+    if fit_params is not None:
+        with open(fit_params, 'rb') as f:
+            fit_params = pickle.load(f)
+
+    for ipoi, poi in enumerate(pois):
         fig, ax = plt.subplots(
             nrows=1, ncols=1,
             figsize = (5.6, 4.8),
@@ -97,9 +157,7 @@ def draw_efficiencies(df, pois, output, label_map, fit_params):
         ax.set_xlabel(r'$p_{\mathrm{T}}^{\mathrm{miss}}$ (GeV)', fontsize=12)
         ax.set_ylabel(label_map.get(poi, poi), fontsize=12)
 
-        popt, pcov = curve_fit(erf_func, bin_cent[bin_cent>=150], df[poi].values[bin_cent>=150], p0=(1, 100, 50))
-        popt = list(popt)
-        print(popt)
+        popt = list(popts[ipoi])
         if popt[0]>1:
             popt[0] = 1
 
@@ -115,22 +173,23 @@ def draw_efficiencies(df, pois, output, label_map, fit_params):
             zorder = 10,
         )
 
-        #z = np.linspace(bin_low.min(), bin_upp.max(), 1000)
-        z = np.linspace(100, bin_upp.max(), 1000)
+        curve = erf_func(z, *popt)
         ax.plot(
             z,
-            erf_func(z, *popt),
+            curve,
             color='red',
             zorder = 20,
         )
+        ax.fill_between(
+            z, curve-bands[ipoi], curve+bands[ipoi],
+            color='red', alpha=0.3, zorder = 15,
+        )
 
         if fit_params is not None:
-            with open(fit_params, 'r') as f:
-                popt = pickle.load(f)
             x = np.linspace(bin_low.min(), 500, 1000)
             ax.plot(
                 x,
-                erf_func(x, *popt),
+                erf_func(x, *fit_params),
                 color='red',
             )
 
@@ -154,7 +213,9 @@ def main():
     pois = options.POIs.split(",")
 
     # Get trigger efficiencies
-    df = get_trigger_efficiencies(options.inputdir, options.regex, pois)
+    df = get_trigger_efficiencies(
+        options.inputdir, options.regex, pois, manifest_path=options.manifest,
+    )
     print(df)
     with open("trigger_df_fit.pkl", 'w') as f:
         pickle.dump(df, f)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+import os
+import subprocess
+import sys
+import time
+
+from utils.combine_cache import (
+    cache_key, is_cacheable, lookup, expected_outputs, store, evict,
+)
+
+def run(exe, args):
+    # Echo the combine output while keeping a copy to replay on cache hits
+    process = subprocess.Popen(
+        [exe] + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    log = []
+    for line in iter(process.stdout.readline, ''):
+        sys.stdout.write(line)
+        log.append(line)
+    process.stdout.close()
+    return process.wait(), "".join(log)
+
+def main():
+    # All arguments are passed on to combine; the cache is configured with
+    # COMBINE_CACHE_DIR and COMBINE_CACHE_SIZE (in GB)
+    exe = "combine"
+    args = sys.argv[1:]
+    if not is_cacheable(args):
+        return subprocess.call([exe] + args)
+
+    key = cache_key(exe, args)
+    meta = lookup(key)
+    if meta is not None:
+        sys.stdout.write(meta["log"])
+        print("Restored {} from cache {}".format(", ".join(meta["outputs"]), key))
+        return 0
+
+    start = time.time()
+    returncode, log = run(exe, args)
+    # Only store complete results written by this call
+    outputs = expected_outputs(args, os.getcwd())
+    if returncode == 0 and all(
+        os.path.isfile(p) and os.path.getmtime(p) >= start-1. for p in outputs
+    ):
+        store(key, args, outputs, log)
+        evict()
+    return returncode
+
+if __name__ == "__main__":
+    sys.exit(main())
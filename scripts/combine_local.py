@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+import argparse
+
+from utils.combine_runner import (
+    CombineJob, output_path, run_jobs, print_timing_table, hadd,
+)
+
+# Stand-in for combineTool.py job submission which runs the split jobs on a
+# local process pool instead of a batch system. Toy seed ranges (-s a:b:c) and
+# grid point splitting (--split-points) are expanded the same way, jobs with a
+# valid output are skipped on a restart, and the limit trees are merged with
+# hadd at the end into higgsCombine<name>.merged.<method>.mH<mass>.root, which
+# no combine call writes (the plain name can be the output of another step,
+# e.g. the singles fit of ll2dscan_ct.sh). Batch-only options are accepted and
+# ignored.
+
+batch_options = ["--sub-opts", "--prefix-file", "--task-name", "--job-mode"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-M", "--method", type=str, required=True,
+                        help="Combine method")
+    parser.add_argument("-m", "--mass", type=str, default="120",
+                        help="Mass passed to combine")
+    parser.add_argument("-n", "--name", type=str, default="Test",
+                        help="Name added to the output files")
+    parser.add_argument("-s", "--seed", type=str, default=None,
+                        help="Seed, comma-delimited seeds or a range a:b:c "\
+                             "(inclusive) with one job per seed")
+    parser.add_argument("--points", type=int, default=None,
+                        help="Number of grid points")
+    parser.add_argument("--split-points", type=int, default=None,
+                        help="Number of grid points per job")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of parallel jobs (default: number of CPUs)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Number of times to retry a failed job")
+    parser.add_argument("--logdir", type=str, default="logs",
+                        help="Directory for the combine logs")
+    parser.add_argument("--rerun", action='store_true', default=False,
+                        help="Rerun jobs which already have a valid output")
+    parser.add_argument("--merge-output", type=str, default=None,
+                        help="Merged output (default: "\
+                             "higgsCombine<name>.merged.<method>.mH<mass>.root)")
+    parser.add_argument("--no-merge", action='store_true', default=False,
+                        help="Leave the job outputs unmerged")
+    for option in batch_options:
+        parser.add_argument(option, type=str, default=None, help="Ignored")
+
+    return parser.parse_known_args()
+
+def expand_seeds(seed):
+    if seed is None:
+        return [None]
+    if ":" in seed:
+        start, stop, step = [int(s) for s in (seed.split(":") + ["1"])[:3]]
+        seeds = list(range(start, stop+1, step))
+    else:
+        seeds = [int(s) for s in seed.split(",")]
+    if -1 in seeds:
+        raise ValueError("Random seeds (-s -1) give unknown output names, "\
+                         "use explicit seeds")
+    return seeds
+
+def expand_points(points, split_points):
+    # (first, last) point ranges as in combineTool --split-points
+    if points is None or split_points is None:
+        return [None]
+    return [
+        (first, min(first+split_points, points)-1)
+        for first in range(0, points, split_points)
+    ]
+
+def create_jobs(options, extra_args):
+    jobs = []
+    for seed in expand_seeds(options.seed):
+        for point_range in expand_points(options.points, options.split_points):
+            name = options.name
+            args = ["-M", options.method, "-m", options.mass] + extra_args
+            if options.points is not None:
+                args += ["--points", str(options.points)]
+            if point_range is not None:
+                name += ".POINTS.{}.{}".format(*point_range)
+                args += [
+                    "--firstPoint", str(point_range[0]),
+                    "--lastPoint", str(point_range[1]),
+                ]
+            if seed is not None:
+                args += ["-s", str(seed)]
+            job_name = name if seed is None else "{}.{}".format(name, seed)
+            jobs.append(CombineJob(
+                job_name, ["-n", name] + args,
+                output_path(name, method=options.method, mass=options.mass, seed=seed),
+            ))
+    return jobs
+
+def main():
+    options, extra_args = parse_args()
+    if options.method == "Impacts":
+        raise ValueError("Use impacts_parallel.py for local impacts")
+
+    jobs = create_jobs(options, extra_args)
+    results = run_jobs(
+        jobs, nproc=options.nproc, retries=options.retries,
+        logdir=options.logdir, skip_existing=not options.rerun,
+    )
+    print_timing_table(results)
+
+    if options.no_merge:
+        return
+    failed = [r[0] for r in results if r[1] == "failed"]
+    if len(failed) > 0:
+        print("Not merging, {} jobs failed: {}".format(len(failed), " ".join(failed)))
+        return
+    output = options.merge_output
+    if output is None:
+        output = output_path(
+            "{}.merged".format(options.name), method=options.method, mass=options.mass,
+        )
+    hadd(output, [job.output for job in jobs])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+import argparse
+import shlex
+
+from utils.combine_runner import (
+    CombineJob, output_path, run_jobs, print_timing_table, read_limit_branches,
+    hadd,
+)
+from utils.gof import pvalue, pvalue_uncertainty, is_converged
+
+safety = ["--rMin", "0.5", "--rMax", "1.5"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("workspace", type=str, help="Input workspace")
+    parser.add_argument("args", type=str, nargs="?", default="",
+                        help="Extra arguments passed to combine")
+    parser.add_argument("name", type=str, nargs="?", default="",
+                        help="Name added to the output files")
+    parser.add_argument("-t", "--toys", type=int, default=10,
+                        help="Number of toys per job")
+    parser.add_argument("--batch", type=int, default=10,
+                        help="Number of jobs (seeds) per batch")
+    parser.add_argument("--max-toys", type=int, default=1000,
+                        help="Maximum total number of toys")
+    parser.add_argument("--target", type=float, default=0.01,
+                        help="Stop once the p-value uncertainty is below this")
+    parser.add_argument("--threshold", type=float, default=0.05,
+                        help="p-value threshold")
+    parser.add_argument("--nsigma", type=float, default=3.,
+                        help="Stop once the p-value is this many standard "\
+                             "deviations from the threshold")
+    parser.add_argument("-m", "--mass", type=str, default="91",
+                        help="Mass passed to combine")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of parallel jobs (default: number of CPUs)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Number of times to retry a failed job")
+    parser.add_argument("--logdir", type=str, default="logs",
+                        help="Directory for the combine logs")
+
+    return parser.parse_args()
+
+def gof_job(options, name, extra_args, seed=None):
+    args = [
+        "-n", name, "-M", "GoodnessOfFit", "-m", options.mass,
+        "-d", options.workspace,
+    ] + safety + extra_args
+    job_name = name
+    if seed is not None:
+        args += ["-s", str(seed), "-t", str(options.toys)]
+        job_name = "{}.{}".format(name, seed)
+    return CombineJob(job_name, args, output_path(
+        name, method="GoodnessOfFit", mass=options.mass, seed=seed,
+    ))
+
+def main():
+    options = parse_args()
+    extra_args = shlex.split(options.args)
+
+    obs_job = gof_job(options, "{}Obs".format(options.name), extra_args)
+    results = run_jobs([obs_job], retries=options.retries, logdir=options.logdir)
+    if results[0][1] == "failed":
+        raise RuntimeError("Observed fit failed, see {}".format(options.logdir))
+    gof_obs = read_limit_branches(obs_job.output, ["limit"])["limit"][0]
+    print("Observed test statistic = {:.3f}".format(gof_obs))
+
+    toys = []
+    outputs = []
+    seed = 0
+    while len(toys) < options.max_toys:
+        nbatch = min(
+            options.batch,
+            (options.max_toys - len(toys) + options.toys - 1) // options.toys,
+        )
+        jobs = [
+            gof_job(options, "{}Toys".format(options.name), extra_args, seed=s)
+            for s in range(seed, seed+nbatch)
+        ]
+        seed += nbatch
+
+        job_results = run_jobs(
+            jobs, nproc=options.nproc, retries=options.retries, logdir=options.logdir,
+        )
+        results.extend(job_results)
+        ntoys = len(toys)
+        for job, result in zip(jobs, job_results):
+            if result[1] == "failed":
+                continue
+            toys.extend(read_limit_branches(job.output, ["limit"])["limit"])
+            outputs.append(job.output)
+        if len(toys) == 0:
+            raise RuntimeError("All toy jobs failed, see {}".format(options.logdir))
+        if len(toys) == ntoys:
+            # Otherwise the seeds keep increasing without ever adding toys
+            print("Stopping, all {} jobs of the batch failed, see {}".format(
+                len(jobs), options.logdir,
+            ))
+            break
+
+        pval = pvalue(toys, gof_obs)
+        uncertainty = pvalue_uncertainty(pval, len(toys))
+        print("{} toys: p-value = {:.4f} +- {:.4f}".format(len(toys), pval, uncertainty))
+        if is_converged(pval, uncertainty, options.target, options.threshold, options.nsigma):
+            break
+
+    print_timing_table(results)
+    hadd(
+        output_path("{}Toys".format(options.name), method="GoodnessOfFit", mass=options.mass),
+        outputs,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+import argparse
+import os
+import shlex
+
+from utils.combine_runner import (
+    CombineJob, output_path, run_jobs, print_timing_table,
+)
+from utils.combine_cache import combine_option
+from utils.datacard import read_datacard, nuisances as datacard_nuisances
+from utils.approx_impacts import (
+    read_fit_result, approximate_impacts, rank_impacts, save_impacts,
+)
+
+safety = ["--robustFit", "1", "--rMin", "0.5", "--rMax", "1.5"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("workspace", type=str, help="Input workspace")
+    parser.add_argument("args", type=str, nargs="?", default="",
+                        help="Extra arguments passed to combine")
+    parser.add_argument("name", type=str, nargs="?", default="",
+                        help="Name added to the output files")
+    parser.add_argument("--datacard", type=str, default=None,
+                        help="Datacard to take the nuisances from (default: "\
+                             "the workspace path with a .txt extension)")
+    parser.add_argument("-m", "--mass", type=str, default="91",
+                        help="Mass passed to combine unless -m is in the "\
+                             "extra arguments")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of parallel jobs (default: number of CPUs)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Number of times to retry a failed job")
+    parser.add_argument("--logdir", type=str, default="logs",
+                        help="Directory for the combine logs")
+    parser.add_argument("--rerun", action='store_true', default=False,
+                        help="Rerun jobs which already have a valid output")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Run the nominal fit first, approximate the "\
+                             "impacts of all nuisances from its covariance "\
+                             "and only run the full impact fits for the TOP "\
+                             "largest")
+    parser.add_argument("--approx-output", type=str, default="impacts_approx{}.json",
+                        help="Output JSON for the approximate impacts ({} is "\
+                             "replaced by the name)")
+
+    return parser.parse_args()
+
+def create_jobs(workspace, nuisances, extra_args, name, mass="91"):
+    # Outputs are named as by combineTool.py -M Impacts, which is what
+    # drawing/impacts.py reads. A -m passed through to combine takes
+    # precedence over mass.
+    if combine_option(extra_args, ["-m", "--mass"]) is None:
+        extra_args = ["-m", mass] + extra_args
+    mass = combine_option(extra_args, ["-m", "--mass"])
+    jobs = []
+
+    job_name = "_initialFit_{}".format(name)
+    jobs.append(CombineJob(job_name, [
+        "-n", job_name, "-M", "MultiDimFit", "--algo", "singles",
+        "--redefineSignalPOIs", "r", "--expectSignal", "1", "--saveFitResult",
+    ] + safety + ["-d", workspace] + extra_args, output_path(job_name, mass=mass)))
+
+    for nuis in nuisances:
+        job_name = "_paramFit_{}_{}".format(name, nuis)
+        jobs.append(CombineJob(job_name, [
+            "-n", job_name, "-M", "MultiDimFit", "--algo", "impact",
+            "--redefineSignalPOIs", "r", "-P", nuis, "--floatOtherPOIs", "1",
+            "--saveInactivePOI", "1", "--expectSignal", "1",
+        ] + safety + ["-d", workspace] + extra_args, output_path(job_name, mass=mass)))
+
+    job_name = "_paramFit_{}_stat".format(name)
+    jobs.append(CombineJob(job_name, [
+        "-n", job_name, "-M", "MultiDimFit", "--algo", "singles",
+        "--freezeParameters", "all", "--expectSignal", "1",
+    ] + safety + [workspace] + extra_args, output_path(job_name, mass=mass)))
+
+    return jobs
+
+def main():
+    options = parse_args()
+    datacard = options.datacard
+    if datacard is None:
+        datacard = os.path.splitext(options.workspace)[0] + ".txt"
+
+    nuisances = datacard_nuisances(read_datacard(datacard))
+    extra_args = shlex.split(options.args)
+    jobs = create_jobs(
+        options.workspace, nuisances, extra_args, options.name, options.mass,
+    )
+    run_options = dict(
+        nproc=options.nproc, retries=options.retries, logdir=options.logdir,
+    )
+
+    results = []
+    if options.top is not None:
+        # Stage 1: nominal fit with the fit result for the approximate impacts
+        fit_result = "multidimfit{}.root".format(jobs[0].name)
+        results += run_jobs(
+            jobs[:1], skip_existing=not options.rerun and os.path.exists(fit_result),
+            **run_options
+        )
+        if results[0][1] == "failed":
+            raise RuntimeError("Nominal fit failed, see {}".format(options.logdir))
+
+        fit_names, fit_values, fit_cov = read_fit_result(fit_result)
+        names, pulls, impacts, bestfit = approximate_impacts(
+            fit_names, fit_values, fit_cov, "r", nuisances,
+        )
+        approx_output = options.approx_output.format(options.name)
+        save_impacts(approx_output, "r", names, pulls, impacts, bestfit)
+        print("Created {}".format(approx_output))
+        for nuis in nuisances:
+            if nuis not in names:
+                print("{} is not floating in the nominal fit".format(nuis))
+
+        # Stage 2: full fits for the largest approximate impacts and stat-only
+        ranked = rank_impacts(names, impacts)[:options.top]
+        jobs = create_jobs(
+            options.workspace, ranked, extra_args, options.name, options.mass,
+        )[1:]
+        print("Running full impact fits for {} of {} nuisances".format(len(ranked), len(names)))
+
+    results += run_jobs(jobs, skip_existing=not options.rerun, **run_options)
+    print_timing_table(results)
+
+if __name__ == "__main__":
+    main()
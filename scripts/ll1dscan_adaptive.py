@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+import argparse
+import shlex
+
+from utils.adaptive_scan import initial_points_1d, propose_points_1d, crossings_1d
+from utils.combine_runner import (
+    CombineJob, output_path, run_jobs, print_timing_table, read_limit_branches,
+    merge_points,
+)
+
+safety = ["--robustFit", "1", "--expectSignal", "1"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("workspace", type=str, help="Input workspace")
+    parser.add_argument("args", type=str, nargs="?", default="",
+                        help="Extra arguments passed to combine")
+    parser.add_argument("name", type=str, nargs="?", default="",
+                        help="Name added to the output files")
+    parser.add_argument("--poi", type=str, default="r", help="POI to scan")
+    parser.add_argument("--levels", type=str, default="1,4",
+                        help="Comma-delimited -2dlnL levels to resolve")
+    parser.add_argument("--tolerance", type=float, default=1e-3,
+                        help="Width in the POI to which each crossing is bracketed")
+    parser.add_argument("--max-iterations", type=int, default=10,
+                        help="Maximum number of refinement rounds")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of parallel fits (default: number of CPUs)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Number of times to retry a failed fit")
+    parser.add_argument("--logdir", type=str, default="logs",
+                        help="Directory for the combine logs")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="Merged scan output (default: "\
+                             "higgsCombineLL1DScan<name>.MultiDimFit.mH120.root)")
+
+    return parser.parse_args()
+
+def point_job(workspace, poi, x, extra_args, name):
+    job_name = "LL1DPoint{}_{:.6f}".format(name, x)
+    return CombineJob(job_name, [
+        "-n", job_name, "-M", "MultiDimFit", "--algo", "fixed",
+        "--fixedPointPOIs", "{}={:.6f}".format(poi, x), workspace,
+    ] + safety + extra_args, output_path(job_name))
+
+def main():
+    options = parse_args()
+    extra_args = shlex.split(options.args)
+    levels = [float(l) for l in options.levels.split(",")]
+
+    # Start from the singles result
+    job_name = "LL1DSingles{}".format(options.name)
+    singles = CombineJob(job_name, [
+        "-n", job_name, "-M", "MultiDimFit", "--algo", "singles", options.workspace,
+    ] + safety + extra_args, output_path(job_name))
+    results = run_jobs([singles], retries=options.retries, logdir=options.logdir)
+    if results[0][1] == "failed":
+        raise RuntimeError("Singles fit failed, see {}".format(options.logdir))
+    poi_vals = read_limit_branches(singles.output, [options.poi])[options.poi]
+    xbf = poi_vals[0]
+    err_down = (xbf - min(poi_vals)) or 0.1
+    err_up = (max(poi_vals) - xbf) or 0.1
+
+    points = {}
+    outputs = {}
+    failed = set()
+    proposals = initial_points_1d(xbf, err_down, err_up)
+    for iteration in range(options.max_iterations):
+        proposals = [round(x, 6) for x in proposals]
+        proposals = [x for x in proposals if x not in points and x not in failed]
+        if len(proposals) == 0:
+            break
+        print("Iteration {}: fitting {} points".format(iteration, len(proposals)))
+
+        jobs = [
+            point_job(options.workspace, options.poi, x, extra_args, options.name)
+            for x in proposals
+        ]
+        job_results = run_jobs(
+            jobs, nproc=options.nproc, retries=options.retries, logdir=options.logdir,
+        )
+        results.extend(job_results)
+        for x, job, result in zip(proposals, jobs, job_results):
+            if result[1] == "failed":
+                failed.add(x)
+                continue
+            points[x] = 2*read_limit_branches(job.output, ["deltaNLL"])["deltaNLL"][-1]
+            outputs[x] = job.output
+
+        proposals, resolved = propose_points_1d(
+            xbf, list(points.keys()), list(points.values()),
+            levels=levels, tolerance=options.tolerance,
+        )
+        if resolved:
+            break
+
+    print_timing_table(results)
+    print("{} = {:.4f} from {} point fits ({} failed)".format(
+        options.poi, xbf, len(points), len(failed),
+    ))
+    for level in levels:
+        down, up = crossings_1d(xbf, list(points.keys()), list(points.values()), level)
+        print("-2dlnL = {}: [{}, {}]".format(
+            level,
+            "unresolved" if down is None else "{:.4f}".format(down),
+            "unresolved" if up is None else "{:.4f}".format(up),
+        ))
+
+    output = options.output
+    if output is None:
+        output = output_path("LL1DScan{}".format(options.name))
+    merge_points(output, [outputs[x] for x in sorted(outputs.keys())])
+
+if __name__ == "__main__":
+    main()
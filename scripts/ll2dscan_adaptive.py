@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+import argparse
+import shlex
+
+from utils.adaptive_scan import (
+    lattice_size, lattice_value, initial_cells_2d, cell_points, refine_cells_2d,
+)
+from utils.combine_runner import (
+    CombineJob, output_path, run_jobs, print_timing_table, read_limit_branches,
+    merge_points,
+)
+
+safety = ["--robustFit", "1"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("workspace", type=str, help="Input workspace")
+    parser.add_argument("args", type=str, nargs="?", default="",
+                        help="Extra arguments passed to combine")
+    parser.add_argument("name", type=str, nargs="?", default="",
+                        help="Name added to the output files")
+    parser.add_argument("--xpoi", type=str, default="rz_ll",
+                        help="Name of the x-axis poi")
+    parser.add_argument("--ypoi", type=str, default="rz_nunu",
+                        help="Name of the y-axis poi")
+    parser.add_argument("--xrange", default="0.5,1.5", help="X-axis range")
+    parser.add_argument("--yrange", default="0.5,1.5", help="Y-axis range")
+    parser.add_argument("--coarse", type=int, default=25,
+                        help="Number of cells in each dimension of the "\
+                             "starting grid")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="Number of times a cell can be halved")
+    parser.add_argument("--levels", type=str, default="2.30,5.99",
+                        help="Comma-delimited -2dlnL levels to refine around")
+    parser.add_argument("-m", "--mass", type=str, default="91",
+                        help="Mass passed to combine")
+    parser.add_argument("-j", "--nproc", type=int, default=None,
+                        help="Number of parallel fits (default: number of CPUs)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Number of times to retry a failed fit")
+    parser.add_argument("--logdir", type=str, default="logs",
+                        help="Directory for the combine logs")
+    parser.add_argument("-o", "--output", type=str, default=None,
+                        help="Merged scan output (default: "\
+                             "higgsCombineLL2DScan<name>.MultiDimFit.mH<mass>.root)")
+
+    return parser.parse_args()
+
+def point_job(options, x, y, extra_args):
+    job_name = "LL2DPoint{}_{:.6f}_{:.6f}".format(options.name, x, y)
+    return CombineJob(job_name, [
+        "-n", job_name, "-M", "MultiDimFit", "-m", options.mass,
+        "--algo", "fixed", "--fixedPointPOIs",
+        "{}={:.6f},{}={:.6f}".format(options.xpoi, x, options.ypoi, y),
+        options.workspace,
+    ] + safety + extra_args, output_path(job_name, mass=options.mass))
+
+def main():
+    options = parse_args()
+    extra_args = shlex.split(options.args)
+    levels = [float(l) for l in options.levels.split(",")]
+    xrange = [float(x) for x in options.xrange.split(",")]
+    yrange = [float(y) for y in options.yrange.split(",")]
+    nlattice = lattice_size(options.coarse, options.depth)
+
+    qs = {}
+    outputs = {}
+    results = []
+    cells = initial_cells_2d(options.coarse, options.depth)
+    points = cell_points(cells)
+    iteration = 0
+    while len(points) > 0:
+        print("Iteration {}: fitting {} points for {} cells".format(
+            iteration, len(points), len(cells),
+        ))
+        jobs = [
+            point_job(
+                options,
+                lattice_value(i, xrange[0], xrange[1], nlattice),
+                lattice_value(j, yrange[0], yrange[1], nlattice),
+                extra_args,
+            ) for i, j in points
+        ]
+        job_results = run_jobs(
+            jobs, nproc=options.nproc, retries=options.retries, logdir=options.logdir,
+        )
+        results.extend(job_results)
+        for point, job, result in zip(points, jobs, job_results):
+            if result[1] == "failed":
+                continue
+            qs[point] = 2*read_limit_branches(job.output, ["deltaNLL"])["deltaNLL"][-1]
+            outputs[point] = job.output
+
+        cells, points = refine_cells_2d(cells, qs, levels)
+        iteration += 1
+
+    print_timing_table(results)
+    print("{} point fits, {} on a uniform grid of the same resolution".format(
+        len(qs), (nlattice+1)**2,
+    ))
+
+    output = options.output
+    if output is None:
+        output = output_path("LL2DScan{}".format(options.name), mass=options.mass)
+    merge_points(output, [outputs[p] for p in sorted(outputs.keys())])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import numpy as np
+
+# Point placement for likelihood scans which only spends fits where they
+# matter: around the crossings of q = -2*deltaNLL with the interval levels and
+# where the curve deviates most from a parabola.
+
+def interpolate_crossing(x0, q0, x1, q1, level):
+    # q is close to parabolic so sqrt(q) is close to linear in the POI
+    s0 = np.sqrt(max(q0, 0.))
+    s1 = np.sqrt(max(q1, 0.))
+    if s1 == s0:
+        return 0.5*(x0 + x1)
+    return x0 + (np.sqrt(level) - s0)*(x1 - x0)/(s1 - s0)
+
+def estimate_crossing(side_x, side_q, i, level):
+    # Root of the parabola through the bracketing points and their nearest
+    # neighbour, falling back to the interpolation in sqrt(q)
+    x0, x1 = side_x[i-1], side_x[i]
+    x_est = interpolate_crossing(x0, side_q[i-1], x1, side_q[i], level)
+    k = i+1 if i+1 < len(side_x) else i-2
+    if k < 0:
+        return x_est
+
+    x = np.array([x0, x1, side_x[k]])
+    q = np.array([side_q[i-1], side_q[i], side_q[k]])
+    coeffs = np.polyfit(x - x0, q - level, 2)
+    roots = np.roots(coeffs) + x0
+    roots = [r.real for r in roots if abs(r.imag) < 1e-12 and min(x0, x1) < r.real < max(x0, x1)]
+    if len(roots) != 1:
+        return x_est
+    return roots[0]
+
+def initial_points_1d(xbf, err_down, err_up, nsigma=(0.5, 1., 1.5, 2., 2.5)):
+    return sorted(
+        [xbf - n*err_down for n in nsigma] + [xbf + n*err_up for n in nsigma]
+    )
+
+def _side(xbf, xs, qs, sign):
+    # Points on one side of the best fit ordered away from it, starting with
+    # the best fit itself
+    side = sorted([(abs(x-xbf), x, q) for x, q in zip(xs, qs) if sign*(x-xbf) > 0])
+    return [xbf] + [s[1] for s in side], [0.] + [s[2] for s in side]
+
+def crossings_1d(xbf, xs, qs, level):
+    # Interpolated (down, up) crossings of the level, None where not bracketed
+    result = []
+    for sign in (-1, 1):
+        side_x, side_q = _side(xbf, xs, qs, sign)
+        above = [i for i, q in enumerate(side_q) if q >= level]
+        if len(above) == 0:
+            result.append(None)
+            continue
+        i = above[0]
+        result.append(interpolate_crossing(
+            side_x[i-1], side_q[i-1], side_x[i], side_q[i], level,
+        ))
+    return tuple(result)
+
+def propose_points_1d(xbf, xs, qs, levels=(1., 4.), tolerance=1e-3):
+    # Returns the new points to fit and whether every crossing is already
+    # bracketed to within the tolerance
+    proposals = []
+    resolved = True
+    for sign in (-1, 1):
+        side_x, side_q = _side(xbf, xs, qs, sign)
+        for level in sorted(levels):
+            above = [i for i, q in enumerate(side_q) if q >= level]
+            if len(above) == 0:
+                # Extrapolate outwards and overshoot a little to bracket it
+                resolved = False
+                x_last = side_x[-1]
+                x_new = x_last + (x_last - xbf)
+                if len(side_x) > 1:
+                    x_est = interpolate_crossing(
+                        side_x[-2], side_q[-2], side_x[-1], side_q[-1], level,
+                    )
+                    if sign*(x_est - x_last) > 0:
+                        x_new = x_last + 1.2*(x_est - x_last)
+                proposals.append(x_new)
+                break
+
+            i = above[0]
+            x0, x1 = side_x[i-1], side_x[i]
+            if abs(x1 - x0) <= tolerance:
+                continue
+            resolved = False
+
+            # A pair of points either side of the estimate brackets the
+            # crossing to the tolerance if the estimate is good
+            x_est = estimate_crossing(side_x, side_q, i, level)
+            lo, hi = min(x0, x1), max(x0, x1)
+            for x_new in (x_est - 0.45*tolerance, x_est + 0.45*tolerance):
+                proposals.append(min(max(x_new, lo + 0.05*tolerance), hi - 0.05*tolerance))
+
+    if not resolved:
+        proposals.extend(propose_curvature_1d(xbf, xs, qs, max(levels), tolerance))
+    return sorted(set(proposals)), resolved
+
+def propose_curvature_1d(xbf, xs, qs, qmax, tolerance):
+    # Midpoint of the wider interval around the point where the second
+    # derivative deviates most from the typical (parabolic) one
+    x = np.array([xbf] + list(xs))
+    q = np.array([0.] + list(qs))
+    sorter = np.argsort(x)
+    x, q = x[sorter], q[sorter]
+    if x.shape[0] < 4:
+        return []
+
+    dx = np.diff(x)
+    slopes = np.diff(q)/dx
+    curv = 2*np.diff(slopes)/(dx[1:] + dx[:-1])
+    deviation = np.abs(curv - np.median(curv))
+    deviation[q[1:-1] > qmax + 1.] = 0.
+
+    i = np.argmax(deviation)
+    j = i if dx[i] >= dx[i+1] else i+1
+    if deviation[i] == 0. or dx[j] < 10*tolerance:
+        return []
+    return [0.5*(x[j] + x[j+1])]
+
+# 2D refinement works on an integer lattice of ncoarse*2**depth intervals per
+# axis so points shared between cells are fitted once. A cell is (i, j, size)
+# with corners at (i, j) and (i+size, j+size) in lattice units and is split
+# into four when the q values at its corners straddle one of the levels.
+
+def lattice_size(ncoarse, depth):
+    return ncoarse*2**depth
+
+def lattice_value(i, lo, hi, nlattice):
+    return lo + (hi - lo)*float(i)/nlattice
+
+def cell_corners(cell):
+    i, j, size = cell
+    return [(i, j), (i+size, j), (i, j+size), (i+size, j+size)]
+
+def initial_cells_2d(ncoarse, depth):
+    size = 2**depth
+    return [
+        (ix*size, iy*size, size)
+        for ix in range(ncoarse) for iy in range(ncoarse)
+    ]
+
+def cell_points(cells):
+    return sorted(set(p for cell in cells for p in cell_corners(cell)))
+
+def straddles(cell, qs, levels):
+    # Cells with a corner missing (failed fit) are not refined
+    corners = [qs.get(p) for p in cell_corners(cell)]
+    if any(q is None for q in corners):
+        return False
+    qmin, qmax = min(corners), max(corners)
+    return any(qmin < level <= qmax for level in levels)
+
+def refine_cells_2d(cells, qs, levels=(2.30, 5.99)):
+    # Returns the children of the cells which straddle a level, together with
+    # the lattice points still to be fitted for them
+    children = []
+    for cell in cells:
+        i, j, size = cell
+        if size == 1 or not straddles(cell, qs, levels):
+            continue
+        half = size//2
+        children.extend([
+            (i, j, half), (i+half, j, half),
+            (i, j+half, half), (i+half, j+half, half),
+        ])
+    return children, [p for p in cell_points(children) if p not in qs]
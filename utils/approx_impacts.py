@@ -0,0 +1,64 @@
+import json
+import numpy as np
+
+# Approximate impacts from the covariance of a single nominal fit saved with
+# --saveFitResult. Moving a nuisance by +-1 sigma and profiling the others
+# shifts the POI by +-cov(poi, theta)/sigma_theta to second order in the NLL,
+# so a nuisance can be ranked without its own --algo impact fit. ROOT is only
+# needed to read the fit result, the JSON can be read in the plotting setup.
+
+def read_fit_result(path, name="fit_mdf"):
+    import ROOT
+    rootfile = ROOT.TFile.Open(path, "READ")
+    fit = rootfile.Get(name)
+    if not fit:
+        raise KeyError("{} not found in {}".format(name, path))
+
+    pars = fit.floatParsFinal()
+    npars = pars.getSize()
+    names = [pars.at(i).GetName() for i in range(npars)]
+    values = np.array([pars.at(i).getVal() for i in range(npars)])
+    matrix = fit.covarianceMatrix()
+    cov = np.array([[matrix(i, j) for j in range(npars)] for i in range(npars)])
+    rootfile.Close()
+    return names, values, cov
+
+def approximate_impacts(names, values, cov, poi, nuisances):
+    # Returns the nuisances floating in the fit, their (value, down, up) and
+    # the (down, up) shift of the POI
+    index = {n: i for i, n in enumerate(names)}
+    selected = [n for n in nuisances if n in index]
+    idx = np.array([index[n] for n in selected], dtype=int)
+    ipoi = index[poi]
+
+    sigma = np.sqrt(np.diag(cov))
+    shift = cov[ipoi, idx]/sigma[idx]
+    pulls = np.stack([values[idx], values[idx]-sigma[idx], values[idx]+sigma[idx]], axis=1)
+    impacts = np.stack([-shift, shift], axis=1)
+    bestfit = [values[ipoi], values[ipoi]-sigma[ipoi], values[ipoi]+sigma[ipoi]]
+    return selected, pulls, impacts, bestfit
+
+def rank_impacts(names, impacts):
+    order = np.argsort(-np.abs(impacts).max(axis=1), kind='mergesort')
+    return [names[i] for i in order]
+
+def save_impacts(path, poi, names, pulls, impacts, bestfit):
+    with open(path, 'w') as f:
+        json.dump({
+            "poi": poi,
+            "bestfit": [float(v) for v in bestfit],
+            "nuisances": {
+                name: {
+                    "pull": [float(v) for v in pulls[i]],
+                    "impact": [float(v) for v in impacts[i]],
+                } for i, name in enumerate(names)
+            },
+        }, f, indent=1, sort_keys=True)
+
+def load_impacts(path):
+    with open(path, 'r') as f:
+        result = json.load(f)
+    names = sorted(result["nuisances"])
+    pulls = np.array([result["nuisances"][n]["pull"] for n in names]).reshape(-1, 3)
+    impacts = np.array([result["nuisances"][n]["impact"] for n in names]).reshape(-1, 2)
+    return result["poi"], names, pulls, impacts, np.array(result["bestfit"])
@@ -0,0 +1,72 @@
+import argparse
+import time
+import numpy as np
+
+from create_ws import create_model
+from fit_functions import crystalballCdf_array
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--npoints", type=int, default=1000,
+                        help="Number of x points to evaluate")
+    parser.add_argument("--params", type=str,
+                        default="150,30,1.2,3,250,80,0.8,2.2,0.3",
+                        help="Comma-delimited mean1, width1, alpha1, n1, "\
+                             "mean2, width2, alpha2, n2, sigfrac")
+    parser.add_argument("--tolerance", type=float, default=1e-8,
+                        help="Maximum difference of the analytic CDF from the "\
+                             "NumPy reference")
+
+    return parser.parse_args()
+
+def evaluate(params, cdf, xvals, pars):
+    for param, val in zip(params[1:], pars):
+        param.setVal(val)
+    x = params[0]
+    values = np.zeros_like(xvals)
+    start = time.time()
+    for idx, xval in enumerate(xvals):
+        x.setVal(xval)
+        values[idx] = cdf.getVal()
+    return values, time.time() - start
+
+def reference_cdf(xvals, xmin, xmax, pars):
+    mean1, width1, alpha1, n1, mean2, width2, alpha2, n2, sigfrac = pars
+    return sigfrac*crystalballCdf_array(xvals, xmin, xmax, mean1, width1, alpha1, n1)\
+            + (1.-sigfrac)*crystalballCdf_array(xvals, xmin, xmax, mean2, width2, alpha2, n2)
+
+def main():
+    options = parse_args()
+    pars = [float(p) for p in options.params.split(",")]
+
+    numeric = create_model(numeric=True)
+    analytic = create_model(numeric=False)
+    xvals = np.linspace(numeric[0][0].getMin(), numeric[0][0].getMax(), options.npoints)
+
+    numeric_vals, numeric_time = evaluate(numeric[0], numeric[1], xvals, pars)
+    analytic_vals, analytic_time = evaluate(analytic[0], analytic[1], xvals, pars)
+
+    print("{:>10} {:>12} {:>16}".format("cdf", "total [s]", "per point [us]"))
+    print("{:>10} {:>12.3f} {:>16.1f}".format(
+        "numeric", numeric_time, 1e6*numeric_time/options.npoints,
+    ))
+    print("{:>10} {:>12.3f} {:>16.1f}".format(
+        "analytic", analytic_time, 1e6*analytic_time/options.npoints,
+    ))
+    print("speedup {:.1f}, max diff {:.2e}".format(
+        numeric_time/analytic_time, np.abs(numeric_vals - analytic_vals).max(),
+    ))
+
+    # The RooFormula CDF must match the NumPy version in fit_functions
+    x = analytic[0][0]
+    reference_diff = np.abs(
+        analytic_vals - reference_cdf(xvals, x.getMin(), x.getMax(), pars)
+    ).max()
+    print("max diff from fit_functions.crystalballCdf_array {:.2e}".format(reference_diff))
+    if not reference_diff <= options.tolerance:
+        raise RuntimeError("Analytic CDF differs from the NumPy reference by "\
+                           "{:.2e}".format(reference_diff))
+
+if __name__ == "__main__":
+    main()
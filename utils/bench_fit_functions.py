@@ -0,0 +1,50 @@
+import argparse
+import time
+import numpy as np
+
+from fit_functions import (
+    erf_func, crystalballEfficiency, doubleCrystalballErrfEfficiency,
+    erf_func_array, crystalballEfficiency_array,
+    doubleCrystalballErrfEfficiency_array,
+)
+
+shapes = [
+    ("erf", erf_func, erf_func_array, [1., 150., 40.]),
+    ("crystalball", crystalballEfficiency, crystalballEfficiency_array,
+     [150., 40., 20., 3., 1.]),
+    ("double crystalball", doubleCrystalballErrfEfficiency,
+     doubleCrystalballErrfEfficiency_array,
+     [150., 40., 20., 3., 0.6, 250., 80., 40., 2., 0.4]),
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--npoints", type=int, default=1000000,
+                        help="Number of points to evaluate")
+
+    return parser.parse_args()
+
+def main():
+    options = parse_args()
+    x = np.linspace(0., 1000., options.npoints)
+
+    print("{:>20} {:>12} {:>12} {:>10} {:>12}".format(
+        "shape", "scalar [s]", "array [s]", "speedup", "max diff",
+    ))
+    for name, scalar_func, array_func, par in shapes:
+        start = time.time()
+        scalar = np.array([scalar_func([xi], par) for xi in x])
+        scalar_time = time.time() - start
+
+        start = time.time()
+        array = array_func(x, *par)
+        array_time = time.time() - start
+
+        print("{:>20} {:>12.3f} {:>12.4f} {:>10.1f} {:>12.2e}".format(
+            name, scalar_time, array_time, scalar_time/array_time,
+            np.abs(scalar - array).max(),
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+def cache_dir():
+    return os.environ.get(
+        "COMBINE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "zinvcombine"),
+    )
+
+def cache_max_bytes():
+    return int(float(os.environ.get("COMBINE_CACHE_SIZE", 10.)) * 1024**3)
+
+def find_executable(name):
+    if os.path.dirname(name):
+        return name if os.path.isfile(name) else None
+    for direc in os.environ.get("PATH", "").split(os.pathsep):
+        path = os.path.join(direc, name)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+def _update_file(hasher, path):
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+
+def datacard_inputs(path):
+    # Shape files referenced by a text datacard also change the result
+    inputs = []
+    with open(path, 'r') as f:
+        for line in f:
+            words = line.split()
+            if len(words) > 3 and words[0] == "shapes":
+                shape_path = os.path.join(os.path.dirname(path), words[3])
+                if os.path.isfile(shape_path) and shape_path not in inputs:
+                    inputs.append(shape_path)
+    return inputs
+
+def input_files(args):
+    inputs = []
+    for arg in args:
+        if "=" in arg and arg.startswith("--"):
+            arg = arg.split("=", 1)[1]
+        if not os.path.isfile(arg) or arg in inputs:
+            continue
+        inputs.append(arg)
+        if arg.endswith(".txt"):
+            inputs.extend([p for p in datacard_inputs(arg) if p not in inputs])
+    return inputs
+
+def cache_key(exe, args):
+    hasher = hashlib.sha256()
+    hasher.update(os.environ.get("CMSSW_BASE", "").encode("utf-8"))
+    exe_path = find_executable(exe)
+    if exe_path is not None:
+        hasher.update("{}:{}".format(exe_path, os.path.getmtime(exe_path)).encode("utf-8"))
+    hasher.update("\0".join(args).encode("utf-8"))
+    for path in input_files(args):
+        hasher.update(b"\0")
+        _update_file(hasher, path)
+    return hasher.hexdigest()
+
+def is_cacheable(args):
+    # A random seed makes the result irreproducible
+    for idx, arg in enumerate(args):
+        if arg in ["-s", "--seed"] and idx+1 < len(args) and args[idx+1] == "-1":
+            return False
+        if arg == "--seed=-1":
+            return False
+    return True
+
+def combine_option(args, names, default=None):
+    # Last value given for any of the option names, as "-n X" or "--name=X"
+    value = default
+    for idx, arg in enumerate(args):
+        if arg in names and idx+1 < len(args):
+            value = args[idx+1]
+        elif "=" in arg and arg.split("=", 1)[0] in names:
+            value = arg.split("=", 1)[1]
+    return value
+
+def expected_outputs(args, directory="."):
+    # Files written by this combine call, following the combine naming
+    # higgsCombine<name>.<method>.mH<mass>[.<seed>].root. Only these are
+    # stored, so jobs sharing a directory do not pick up each other's outputs.
+    name = combine_option(args, ["-n", "--name"], "Test")
+    method = combine_option(args, ["-M", "--method"], "AsymptoticLimits")
+    mass = "{:g}".format(float(combine_option(args, ["-m", "--mass"], 120)))
+    seed = int(combine_option(args, ["-s", "--seed"], 123456))
+    toys = int(combine_option(args, ["-t", "--toys"], 0))
+
+    filename = "higgsCombine{}.{}.mH{}".format(name, method, mass)
+    if toys > 0 or seed != 123456:
+        filename += ".{}".format(seed)
+    outputs = [filename + ".root"]
+    if method == "FitDiagnostics":
+        outputs.append("fitDiagnostics{}.root".format(name))
+    elif method == "MultiDimFit" and "--saveFitResult" in args:
+        outputs.append("multidimfit{}.root".format(name))
+    return [os.path.join(directory, o) for o in outputs]
+
+def lookup(key, directory="."):
+    entry = os.path.join(cache_dir(), key)
+    meta_path = os.path.join(entry, "meta.json")
+    if not os.path.isfile(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    for filename in meta["outputs"]:
+        shutil.copy2(os.path.join(entry, filename), os.path.join(directory, filename))
+    # entry mtime is the last access used for the LRU eviction
+    os.utime(entry, None)
+    return meta
+
+def store(key, args, outputs, log):
+    entry = os.path.join(cache_dir(), key)
+    tmp_entry = "{}.tmp{}".format(entry, os.getpid())
+    if os.path.isdir(entry):
+        return
+    os.makedirs(tmp_entry)
+    for path in outputs:
+        shutil.copy2(path, os.path.join(tmp_entry, os.path.basename(path)))
+    with open(os.path.join(tmp_entry, "meta.json"), 'w') as f:
+        json.dump({
+            "args": args,
+            "outputs": [os.path.basename(p) for p in outputs],
+            "log": log,
+            "created": time.time(),
+        }, f)
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another process stored the same result first
+        shutil.rmtree(tmp_entry)
+
+def _entry_size(entry):
+    return sum([
+        os.path.getsize(os.path.join(entry, filename))
+        for filename in os.listdir(entry)
+    ])
+
+def evict(max_bytes=None):
+    if max_bytes is None:
+        max_bytes = cache_max_bytes()
+    directory = cache_dir()
+    if not os.path.isdir(directory):
+        return []
+
+    # Skip the <key>.tmp<pid> directories of entries still being stored
+    entries = [
+        os.path.join(directory, e) for e in os.listdir(directory)
+        if ".tmp" not in e and os.path.isfile(os.path.join(directory, e, "meta.json"))
+    ]
+    entries = sorted(entries, key=os.path.getmtime)
+    sizes = [_entry_size(e) for e in entries]
+    total = sum(sizes)
+
+    evicted = []
+    for entry, size in zip(entries, sizes):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry)
+        total -= size
+        evicted.append(entry)
+    return evicted
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import subprocess
+import time
+from collections import namedtuple
+
+import ROOT
+
+CombineJob = namedtuple("CombineJob", ["name", "args", "output"])
+
+def combine_exe():
+    return os.environ.get("COMBINE", "combine")
+
+def output_path(name, method="MultiDimFit", mass=120, seed=None):
+    # combine writes the mass with %g, e.g. -m 91.0 gives mH91
+    path = "higgsCombine{}.{}.mH{:g}".format(name, method, float(mass))
+    if seed is not None:
+        path += ".{}".format(seed)
+    return path + ".root"
+
+def is_valid_output(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    rootfile = ROOT.TFile.Open(path, "READ")
+    if not rootfile or rootfile.IsZombie() or rootfile.TestBit(ROOT.TFile.kRecovered):
+        return False
+    tree = rootfile.Get("limit")
+    valid = bool(tree) and tree.GetEntries() > 0
+    rootfile.Close()
+    return valid
+
+def read_limit_branches(path, branches):
+    rootfile = ROOT.TFile.Open(path, "READ")
+    tree = rootfile.Get("limit")
+    values = {b: [] for b in branches}
+    for ientry in range(tree.GetEntries()):
+        tree.GetEntry(ientry)
+        for branch in branches:
+            values[branch].append(getattr(tree, branch))
+    rootfile.Close()
+    return values
+
+def hadd(output, paths):
+    return subprocess.call(["hadd", "-f", output] + list(paths))
+
+def merge_points(output, paths):
+    # Each --algo fixed output starts with its own best fit
+    # (quantileExpected == 1). Keep the first of these, as the single best fit
+    # the drawing scripts skip, followed by the point rows of every file.
+    chain = ROOT.TChain("limit")
+    for path in paths:
+        chain.Add(path)
+    outfile = ROOT.TFile.Open(output, "RECREATE")
+    tree = chain.CopyTree("Entry$ == 0 || quantileExpected != 1")
+    tree.Write()
+    outfile.Close()
+
+def run_job(job_args):
+    job, retries, logdir = job_args
+    logpath = os.path.join(logdir, "{}.log".format(job.name))
+
+    start = time.time()
+    status = "failed"
+    for attempt in range(1, retries+2):
+        with open(logpath, 'w') as log:
+            returncode = subprocess.call(
+                [combine_exe()] + job.args, stdout=log, stderr=subprocess.STDOUT,
+            )
+        if returncode == 0 and is_valid_output(job.output):
+            status = "done"
+            break
+    return job.name, status, attempt, time.time() - start
+
+def _run_indexed(task):
+    return task[0], run_job(task[1:])
+
+def run_jobs(jobs, nproc=None, retries=1, logdir="logs", skip_existing=True):
+    if not os.path.isdir(logdir):
+        os.makedirs(logdir)
+
+    results = [None]*len(jobs)
+    pending = []
+    for idx, job in enumerate(jobs):
+        if skip_existing and is_valid_output(job.output):
+            results[idx] = (job.name, "skipped", 0, 0.)
+        else:
+            pending.append(idx)
+
+    nproc = nproc or multiprocessing.cpu_count()
+    print("Running {} of {} jobs on {} processes".format(len(pending), len(jobs), nproc))
+    if len(pending) == 0:
+        return results
+
+    pool = multiprocessing.Pool(min(nproc, len(pending)))
+    try:
+        tasks = [(idx, jobs[idx], retries, logdir) for idx in pending]
+        for ndone, (idx, result) in enumerate(pool.imap_unordered(_run_indexed, tasks)):
+            results[idx] = result
+            print("[{}/{}] {} {} ({:.1f} s)".format(
+                ndone+1, len(pending), result[0], result[1], result[3],
+            ))
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return results
+
+def print_timing_table(results):
+    width = max([len(r[0]) for r in results] + [3])
+    print("{:<{w}} {:>8} {:>8} {:>12}".format("job", "status", "attempts", "wall [s]", w=width))
+    for name, status, attempts, walltime in results:
+        print("{:<{w}} {:>8} {:>8} {:>12.1f}".format(name, status, attempts, walltime, w=width))
+    nfailed = len([r for r in results if r[1] == "failed"])
+    print("{} jobs, {} failed, {:.1f} s summed wall time".format(
+        len(results), nfailed, sum([r[3] for r in results]),
+    ))
@@ -1,9 +1,56 @@
+import argparse
 import ROOT
 
-def main():
-    rfile = ROOT.TFile("fitfuncs.root", "RECREATE")
-    ws = ROOT.RooWorkspace("w")
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-o", "--output", type=str, default="fitfuncs.root",
+                        help="Output ROOT file")
+    parser.add_argument("--numeric", action='store_true', default=False,
+                        help="Use the numerically integrated createCdf instead "\
+                             "of the analytic CDF")
+
+    return parser.parse_args()
+
+def cb_integral(t, alpha, n):
+    # Indefinite integral of the RooCBShape in t = (x-mean)/width*sign(alpha):
+    # the power-law tail below -|alpha| and the Gaussian core above it, written
+    # without branches by clamping t to either side of -|alpha| (needs n > 1).
+    # bench_create_ws.py checks cb_cdf against the NumPy
+    # fit_functions.crystalballCdf_array so the two cannot drift apart.
+    abs_alpha = "TMath::Max(TMath::Abs({}), 1e-6)".format(alpha)
+    a = "(TMath::Power({n}/{a}, {n})*TMath::Exp(-0.5*{a}*{a}))".format(n=n, a=abs_alpha)
+    b = "({n}/{a} - {a})".format(n=n, a=abs_alpha)
+    tail = "({A}/({n}-1.)*TMath::Power(TMath::Max({b} - TMath::Min({t}, -{a}), 1e-12), 1.-{n}))".format(
+        A=a, b=b, t=t, a=abs_alpha, n=n,
+    )
+    core = "(sqrt(TMath::Pi()/2.)*(TMath::Erf(TMath::Max({t}, -{a})/sqrt(2.)) + TMath::Erf({a}/sqrt(2.))))".format(
+        t=t, a=abs_alpha,
+    )
+    return "({} + {})".format(tail, core)
+
+def cb_cdf(x, xmin, xmax, mean, width, alpha, n):
+    # CDF normalised over the x range as for createCdf
+    def integral(xval):
+        t = "(({}-{})/{}*TMath::Sign(1., {}))".format(xval, mean, width, alpha)
+        return cb_integral(t, alpha, n)
+    return "(({0} - {1})/({2} - {1}))".format(
+        integral(x), integral(repr(xmin)), integral(repr(xmax)),
+    )
+
+def analytic_cdf(x, mean1, width1, alpha1, n1, mean2, width2, alpha2, n2, sigfrac):
+    xmin, xmax = x.getMin(), x.getMax()
+    formula = "@9*{} + (1.-@9)*{}".format(
+        cb_cdf("@0", xmin, xmax, "@1", "@2", "@3", "@4"),
+        cb_cdf("@0", xmin, xmax, "@5", "@6", "@7", "@8"),
+    )
+    return ROOT.RooFormulaVar("cbsumcdf", "cbsumcdf", formula, ROOT.RooArgList(
+        x, mean1, width1, alpha1, n1, mean2, width2, alpha2, n2, sigfrac,
+    ))
 
+def create_model(numeric=False):
+    # Returns the CDF with its parameters. The pdfs are returned as well so
+    # they stay alive as long as the numeric CDF which depends on them.
     x = ROOT.RooRealVar("x", "x", 0, 1000)
     mean1 = ROOT.RooRealVar("mean1", "mean1", 100, 0, 400)
     width1 = ROOT.RooRealVar("width1", "width1", 50, 0, 400)
@@ -14,26 +61,36 @@ def main():
     alpha2 = ROOT.RooRealVar("alpha2", "alpha2", 0.1, 0, 10)
     n2 = ROOT.RooRealVar("n2", "n2", 1.5, 0, 10)
     sigfrac = ROOT.RooRealVar("sigfrac", "sigfrac", 0.5, 0, 1)
-    cb1 = ROOT.RooCBShape("cb1", "cb1", x, mean1, width1, alpha1, n1)
-    cb2 = ROOT.RooCBShape("cb2", "cb2", x, mean2, width2, alpha2, n2)
-    cblist = ROOT.RooArgList(cb1, cb2)
-    cbsum = ROOT.RooAddPdf("cbsum", "cbsum", cblist, ROOT.RooArgList(sigfrac))
-    cbsumcdf = cbsum.createCdf(ROOT.RooArgSet(x))
+    params = [x, mean1, width1, alpha1, n1, mean2, width2, alpha2, n2, sigfrac]
+
+    if numeric:
+        cb1 = ROOT.RooCBShape("cb1", "cb1", x, mean1, width1, alpha1, n1)
+        cb2 = ROOT.RooCBShape("cb2", "cb2", x, mean2, width2, alpha2, n2)
+        cblist = ROOT.RooArgList(cb1, cb2)
+        cbsum = ROOT.RooAddPdf("cbsum", "cbsum", cblist, ROOT.RooArgList(sigfrac))
+        cbsumcdf = cbsum.createCdf(ROOT.RooArgSet(x))
+        return params, cbsumcdf, [cb1, cb2, cblist, cbsum]
+
+    n1.setMin(1.01)
+    n2.setMin(1.01)
+    return params, analytic_cdf(*params), []
+
+def create_workspace(output, numeric=False):
+    rfile = ROOT.TFile(output, "RECREATE")
+    ws = ROOT.RooWorkspace("w")
+
+    params, cbsumcdf, pdfs = create_model(numeric)
     cbsumcdf.Print()
-    getattr(ws, "import")(x)
-    getattr(ws, "import")(mean1)
-    getattr(ws, "import")(width1)
-    getattr(ws, "import")(alpha1)
-    getattr(ws, "import")(n1)
-    getattr(ws, "import")(mean2)
-    getattr(ws, "import")(width2)
-    getattr(ws, "import")(alpha2)
-    getattr(ws, "import")(n2)
-    getattr(ws, "import")(sigfrac)
+    for param in params:
+        getattr(ws, "import")(param)
     getattr(ws, "import")(cbsumcdf)
 
     ws.Write()
     rfile.Close()
 
+def main():
+    options = parse_args()
+    create_workspace(options.output, numeric=options.numeric)
+
 if __name__ == "__main__":
     main()
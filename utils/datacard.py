@@ -0,0 +1,233 @@
+import argparse
+import fnmatch
+import hashlib
+import os
+import numpy as np
+
+from utils.combine_cache import cache_dir
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+# Parser for text datacards into a dict of NumPy arrays indexed by column
+# (bin, process) and systematic, so job generators can query nuisances per
+# channel or process without re-reading the card. Parsed cards are pickled in
+# $COMBINE_CACHE_DIR/datacards keyed by the hash of the card and the parser
+# version, which must be bumped whenever the parsed structure changes.
+
+parser_version = 2
+
+column_types = [
+    "lnN", "lnU", "shape", "shapeN", "shapeN2", "shapeU", "shape?", "gmM", "trG",
+]
+param_types = ["param", "flatParam", "extArg", "discrete"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("datacard", type=str, help="Input text datacard")
+    parser.add_argument("--channel", type=str, default=None,
+                        help="Only nuisances affecting this channel")
+    parser.add_argument("--process", type=str, default=None,
+                        help="Only nuisances affecting this process")
+    parser.add_argument("--mcstat", action='store_true', default=False,
+                        help="List the autoMCStats parameters instead")
+    parser.add_argument("--sort", action='store_true', default=False,
+                        help="Sort the names instead of the datacard order")
+    parser.add_argument("--no-cache", action='store_true', default=False,
+                        help="Do not read or write the parsed datacard cache")
+
+    return parser.parse_args()
+
+def _effect(value):
+    # (down, up) of a column entry, NaN where the column is not affected
+    if value in ["-", "0"]:
+        return np.nan, np.nan
+    if "/" in value:
+        down, up = value.split("/")
+        return float(down), float(up)
+    return float(value), float(value)
+
+def parse_datacard(path):
+    with open(path, 'r') as f:
+        lines = [l.split() for l in f.read().splitlines()]
+
+    card = {
+        "path": path, "shapes": [], "channels": [], "observations": [],
+        "bins": [], "processes": [], "process_ids": [], "rates": [],
+        "systematics": [], "systematic_types": [], "effects": [],
+        "rate_params": [], "params": [], "auto_mc_stats": {}, "groups": {},
+        "nuisances": [],
+    }
+    seen_observation = False
+    for words in lines:
+        if len(words) == 0 or words[0].startswith("#") or words[0].startswith("---"):
+            continue
+        key = words[0]
+
+        if key in ["imax", "jmax", "kmax"]:
+            continue
+        elif key == "shapes":
+            # process, channel, file, histogram, systematic histogram
+            card["shapes"].append((words[1:6] + [None]*5)[:5])
+        elif key == "bin":
+            if seen_observation:
+                card["bins"] = words[1:]
+            else:
+                card["channels"] = words[1:]
+        elif key == "observation":
+            seen_observation = True
+            card["observations"] = [float(w) for w in words[1:]]
+        elif key == "process":
+            if all(w.lstrip("-").isdigit() for w in words[1:]):
+                card["process_ids"] = [int(w) for w in words[1:]]
+            else:
+                card["processes"] = words[1:]
+        elif key == "rate":
+            card["rates"] = [float(w) for w in words[1:]]
+        elif len(words) > 1 and words[1] == "autoMCStats":
+            card["auto_mc_stats"][key] = (
+                float(words[2]),
+                bool(int(words[3])) if len(words) > 3 else False,
+                int(words[4]) if len(words) > 4 else 1,
+            )
+        elif len(words) > 1 and words[1] == "group":
+            card["groups"].setdefault(key, []).extend(words[3:])
+        elif key == "nuisance":
+            continue
+        elif len(words) > 1:
+            name, kind = words[0], words[1]
+            if kind in column_types or kind == "gmN":
+                values = words[3:] if kind == "gmN" else words[2:]
+                card["systematics"].append(name)
+                card["systematic_types"].append(kind)
+                card["effects"].append([_effect(v) for v in values])
+            elif kind == "rateParam":
+                card["rate_params"].append((name, words[2], words[3]))
+            elif kind in param_types:
+                card["params"].append(name)
+            else:
+                continue
+            if name not in card["nuisances"]:
+                card["nuisances"].append(name)
+
+    if len(card["channels"]) == 0:
+        card["channels"] = list(dict.fromkeys(card["bins"]))
+    ncol = len(card["bins"])
+    effects = np.array(card["effects"], dtype=float).reshape(-1, ncol, 2)
+    for key in ["channels", "bins", "processes", "systematics", "systematic_types"]:
+        card[key] = np.array(card[key], dtype=str)
+    card["observations"] = np.array(card["observations"], dtype=float)
+    card["process_ids"] = np.array(card["process_ids"], dtype=int)
+    card["rates"] = np.array(card["rates"], dtype=float)
+    card["effects_down"] = effects[:,:,0]
+    card["effects_up"] = effects[:,:,1]
+    card["active"] = np.isfinite(card["effects_up"])
+    del card["effects"]
+    return card
+
+def file_hash(path):
+    hasher = hashlib.sha1()
+    hasher.update("datacard parser {}\n".format(parser_version).encode("utf-8"))
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def read_datacard(path, use_cache=True):
+    if not use_cache:
+        return parse_datacard(path)
+
+    cache_path = os.path.join(cache_dir(), "datacards", file_hash(path) + ".pkl")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            card = pickle.load(f)
+        card["path"] = path
+        return card
+
+    card = parse_datacard(path)
+    if not os.path.isdir(os.path.dirname(cache_path)):
+        os.makedirs(os.path.dirname(cache_path))
+    tmp_path = "{}.{}".format(cache_path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(card, f)
+    os.rename(tmp_path, cache_path)
+    return card
+
+def nuisances(card, channel=None, process=None):
+    # Names in datacard order. With a channel and/or process only those
+    # affecting a matching column (systematics) or matching the rateParam
+    # patterns are kept. params are not tied to columns and are dropped then.
+    if channel is None and process is None:
+        return list(card["nuisances"])
+
+    columns = np.ones(card["bins"].shape[0], dtype=bool)
+    if channel is not None:
+        columns &= card["bins"] == channel
+    if process is not None:
+        columns &= card["processes"] == process
+    selected = set(card["systematics"][card["active"][:,columns].any(axis=1)])
+
+    for name, bin_pattern, process_pattern in card["rate_params"]:
+        if (channel is None or fnmatch.fnmatchcase(channel, bin_pattern))\
+           and (process is None or fnmatch.fnmatchcase(process, process_pattern)):
+            selected.add(name)
+    return [n for n in card["nuisances"] if n in selected]
+
+def shape_histogram(card, channel, process):
+    # (file, histogram) of the nominal template from the most specific
+    # matching shapes line
+    candidates = []
+    for shape_process, shape_channel, filename, histname, _ in card["shapes"]:
+        if histname is None:
+            continue
+        if fnmatch.fnmatchcase(channel, shape_channel) and fnmatch.fnmatchcase(process, shape_process):
+            candidates.append(((shape_channel == "*") + (shape_process == "*"), filename, histname))
+    if len(candidates) == 0:
+        raise KeyError("No shapes line for {} {}".format(channel, process))
+    _, filename, histname = sorted(candidates, key=lambda c: c[0])[0]
+    histname = histname.replace("$CHANNEL", channel).replace("$PROCESS", process)
+    return os.path.join(os.path.dirname(card["path"]), filename), histname
+
+def channel_nbins(card, channel):
+    import ROOT
+    filename, histname = shape_histogram(card, channel, "data_obs")
+    rootfile = ROOT.TFile.Open(filename, "READ")
+    hist = rootfile.Get(histname)
+    if not hist:
+        raise KeyError("{} not found in {}".format(histname, filename))
+    nbins = hist.GetNbinsX()
+    rootfile.Close()
+    return nbins
+
+def mcstat_parameters(card, channel=None, nbins=None):
+    # One prop_bin<channel>_bin<i> per bin of every channel with autoMCStats,
+    # i.e. assuming all bins are above the threshold for the single
+    # Barlow-Beeston-lite parameter. nbins maps channel to the number of bins
+    # and is read from the data_obs templates otherwise.
+    stats = card["auto_mc_stats"]
+    names = []
+    for ch in card["channels"]:
+        if channel is not None and ch != channel:
+            continue
+        if not any(fnmatch.fnmatchcase(ch, pattern) for pattern in stats):
+            continue
+        nch = nbins[ch] if nbins is not None else channel_nbins(card, ch)
+        names.extend(["prop_bin{}_bin{}".format(ch, i) for i in range(nch)])
+    return names
+
+def main():
+    options = parse_args()
+    card = read_datacard(options.datacard, use_cache=not options.no_cache)
+    if options.mcstat:
+        names = mcstat_parameters(card, channel=options.channel)
+    else:
+        names = nuisances(card, channel=options.channel, process=options.process)
+    if options.sort:
+        names = sorted(set(names))
+    print(" ".join(names))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import ROOT
-import np
+import numpy as np
+
+from scipy.special import erf
 
 def erf_func(x, par):
     x    = x[0]
@@ -58,4 +60,52 @@ def _crystalballEfficiency(m, m0, sigma, alpha, n, norm):
         return norm * (1 + approx_erf) * sqrt_pi_half / area
     else:
         return norm * (left_area + a * (1/((t-b)**(n-1)) - \
-                                        1/((abs_alpha-b)**(n-1)) / (1-n)) / area
+                                        1/((abs_alpha-b)**(n-1))) / (1-n)) / area
+
+# Array versions of the shapes above. x and the parameters are broadcast
+# against each other, e.g. x of shape (npoints,) with parameters of shape
+# (nbatch, 1) evaluates every parameter set on every point in one call.
+def erf_func_array(x, norm, offset, width):
+    return 0.5*norm*(1 + erf((x - offset)/(np.sqrt(2)*width)))
+
+def crystalballEfficiency_array(m, m0, sigma, alpha, n, norm):
+    sqrt_pi_half = np.sqrt(np.pi/2)
+    sqrt_two     = np.sqrt(2.)
+    sig          = np.abs(sigma)
+    t            = (m - m0)/sig * np.sign(alpha)
+    abs_alpha    = np.abs(alpha/sig)
+    a            = (n/abs_alpha)**(n) * np.exp(-0.5*abs_alpha**2)
+    b            = abs_alpha - n/abs_alpha
+
+    left_area  = (1. + erf(abs_alpha/sqrt_two)) * sqrt_pi_half
+    right_area = (a/((abs_alpha-b)**(n-1))) / (n-1)
+    area       = left_area + right_area
+
+    # Evaluate each branch only where it is valid so the power-law tail is
+    # never raised from a negative base
+    core = t <= abs_alpha
+    t_core = np.where(core, t, abs_alpha)
+    t_tail = np.where(core, abs_alpha, t)
+    core_eff = (1 + erf(t_core/sqrt_two)) * sqrt_pi_half
+    tail_eff = left_area + a * (1/((t_tail-b)**(n-1)) - \
+                                1/((abs_alpha-b)**(n-1))) / (1-n)
+    return norm * np.where(core, core_eff, tail_eff) / area
+
+def doubleCrystalballErrfEfficiency_array(m, m0_1, sigma_1, alpha_1, n_1, norm_1,
+                                          m0_2, sigma_2, alpha_2, n_2, norm_2):
+    return crystalballEfficiency_array(m, m0_1, sigma_1, alpha_1, n_1, norm_1) + \
+           crystalballEfficiency_array(m, m0_2, sigma_2, alpha_2, n_2, norm_2)
+
+def crystalballCdf_array(x, xmin, xmax, m0, sigma, alpha, n):
+    # CDF of the RooCBShape normalised over [xmin, xmax], as built by
+    # create_ws.cb_cdf. The RooCBShape tail is on the other side and alpha is
+    # in units of sigma, so its CDF is the mirrored efficiency above.
+    def full(xval):
+        return 1. - crystalballEfficiency_array(2*m0 - xval, m0, sigma, alpha*sigma, n, 1.)
+    return (full(x) - full(xmin))/(full(xmax) - full(xmin))
+
+def tf1_callback(func, npar):
+    # Wrap an array function with the TF1 (x, par) signature
+    def callback(x, par):
+        return float(func(x[0], *[par[i] for i in range(npar)]))
+    return callback
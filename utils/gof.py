@@ -0,0 +1,22 @@
+import numpy as np
+
+# Toy-based goodness-of-fit p-value shared by the drawing and the sequential
+# toy generation: the fraction of toys with a test statistic above the observed
+# one, with its binomial uncertainty.
+
+def pvalue(toys, gof_obs):
+    toys = np.asarray(toys)
+    nabove = toys[toys > gof_obs].shape[0]
+    ntotal = toys.shape[0]
+    return float(nabove) / ntotal
+
+def pvalue_uncertainty(pvalue, ntotal):
+    # Binomial error, with p pulled away from 0 and 1 by one pseudo-count so a
+    # handful of toys all on one side does not give a zero uncertainty
+    p = (pvalue*ntotal + 1.) / (ntotal + 2.)
+    return np.sqrt(p*(1.-p)/ntotal)
+
+def is_converged(pvalue, uncertainty, target, threshold=0.05, nsigma=3.):
+    # Enough toys once the uncertainty reaches the target, or once the p-value
+    # is clearly on one side of the threshold
+    return uncertainty < target or abs(pvalue - threshold) > nsigma*uncertainty
@@ -0,0 +1,99 @@
+import argparse
+import os
+import time
+import ROOT
+import numpy as np
+
+from wsbuild_trigger_erfpdfs import create_workspace, nmu_map
+
+processes = ["singlemu", "doublemu", "triplemu"]
+params = {
+    "eff0": 0.98, "mean0": 150., "sigma0": 40.,
+    "effmu": 0.99, "meanmu": -100., "sigmamu": 120.,
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-n", "--nevals", type=int, default=1000,
+                        help="Number of NLL evaluations to time")
+    parser.add_argument("--outdir", type=str, default=".",
+                        help="Directory for the benchmark workspaces")
+
+    return parser.parse_args()
+
+def create_inputs():
+    bins = np.array([200,220,250,280,310,340,370,400,430,470,510,550,590,640,690,740,790,840,900,960,1020,1100], dtype=float)
+    bins_cent = (bins[1:] + bins[:-1])/2
+    rng = np.random.RandomState(12345)
+
+    def erf_eff(norm, mean, sigma):
+        return np.array([
+            norm*0.5*(1 + ROOT.TMath.Erf((x-mean)/(sigma*np.sqrt(2))))
+            for x in bins_cent
+        ])
+
+    data_dict, proc_dict = {}, {}
+    for proc in processes:
+        nmu = nmu_map[proc]
+        total = 1e5*np.exp(-bins_cent/150.)/nmu
+        eff = erf_eff(params["eff0"], params["mean0"], params["sigma0"])\
+                * erf_eff(params["effmu"], params["meanmu"], params["sigmamu"])**nmu
+        data_dict[proc] = rng.poisson(total).astype(float)
+        proc_dict[proc] = rng.poisson(total*eff).astype(float)
+    return bins, data_dict, proc_dict
+
+def time_nll(path, data_dict, nevals):
+    rootfile = ROOT.TFile.Open(path, "READ")
+    wspace = rootfile.Get("wspace")
+    for param, value in params.items():
+        wspace.var(param).setVal(value)
+
+    yields = {}
+    for proc in processes:
+        norm = wspace.function("{0}_{0}_pass_norm".format(proc))
+        yields[proc] = [norm.list().at(i) for i in range(norm.list().getSize())]
+
+    var_mean0 = wspace.var("mean0")
+    start = time.time()
+    for ieval in range(nevals):
+        # Shift a parameter so every evaluation recomputes the yields
+        var_mean0.setVal(params["mean0"] + 1e-3*(ieval % 2))
+        nll = 0.
+        for proc in processes:
+            for ibin, func in enumerate(yields[proc]):
+                mu = func.getVal()
+                nll += mu - data_dict[proc][ibin]*np.log(mu)
+    elapsed = time.time() - start
+    rootfile.Close()
+    return elapsed, nll
+
+def main():
+    options = parse_args()
+    bins, data_dict, proc_dict = create_inputs()
+
+    results = []
+    for compact in [False, True]:
+        mode = "compact" if compact else "graph"
+        path = os.path.join(options.outdir, "bench_workspace_{}.root".format(mode))
+
+        start = time.time()
+        create_workspace(
+            bins, processes, data_dict, proc_dict, "{}:wspace".format(path),
+            compact=compact,
+        )
+        build_time = time.time() - start
+
+        nll_time, nll = time_nll(path, data_dict, options.nevals)
+        results.append((mode, build_time, os.path.getsize(path), nll_time, nll))
+
+    print("{:>8} {:>12} {:>12} {:>16} {:>16}".format(
+        "mode", "build [s]", "size [kB]", "NLL eval [ms]", "NLL",
+    ))
+    for mode, build_time, size, nll_time, nll in results:
+        print("{:>8} {:>12.3f} {:>12.1f} {:>16.4f} {:>16.6f}".format(
+            mode, build_time, size/1024., 1e3*nll_time/options.nevals, nll,
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import time
+import numpy as np
+
+from scipy.optimize import minimize
+from scipy.special import erf
+
+from wsbuild_trigger_erfpdfs import get_hist, nmu_map
+
+param_names = ["eff0", "mean0", "sigma0", "effmu", "meanmu", "sigmamu"]
+param_start = np.array([1., 150., 50., 1., -100., 100.])
+param_bounds = [(0.9, 1.1), (0., 300.), (1e-3, 300.), (0.9, 1.1), (-500., 0.), (1e-3, 500.)]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-i", "--input", type=str,
+                        default="Zinv_METnoX-ShapeTemplates_met_trigger.root",
+                        help="Input file with the trigger shape templates")
+    parser.add_argument("--processes", type=str, default="singlemu,doublemu,triplemu",
+                        help="Comma-delimited categories to fit")
+    parser.add_argument("--syst", type=float, default=0.,
+                        help="Interpolation between the power (0) and linear "\
+                             "(1) combination of the efficiencies")
+
+    return parser.parse_args()
+
+def get_inputs(filename, processes):
+    xcent, data, mcyield, nmu = [], [], [], []
+    for proc in processes:
+        bins, data_proc, _ = get_hist("{}:{}/data_obs".format(filename, proc))
+        _, mc_proc, _ = get_hist("{}:{}/{}_pass".format(filename, proc, proc))
+        xcent.append((bins[1:] + bins[:-1])/2)
+        data.append(data_proc)
+        mcyield.append(mc_proc)
+        nmu.append([nmu_map[proc]])
+    return np.array(xcent), np.array(data), np.array(mcyield), np.array(nmu, dtype=float)
+
+def _erf_eff(x, norm, mean, sigma):
+    # Efficiency and its derivatives wrt (norm, mean, sigma)
+    z = (x - mean)/(sigma*np.sqrt(2))
+    base = 0.5*(1 + erf(z))
+    gauss = norm*np.exp(-z**2)/np.sqrt(np.pi)
+    return norm*base, np.stack([
+        base, -gauss/(sigma*np.sqrt(2)), -gauss*z/sigma,
+    ], axis=-1)
+
+def model_yields(params, xcent, mcyield, nmu, syst=0.):
+    # params has shape (..., 6) and is broadcast against the (category, bin)
+    # arrays so many parameter points can be evaluated in one call
+    p = np.asarray(params, dtype=float)[..., None, None, :]
+    eff0, deff0 = _erf_eff(xcent, p[...,0], p[...,1], p[...,2])
+    effmu, deffmu = _erf_eff(xcent, p[...,3], p[...,4], p[...,5])
+
+    eff_linear = eff0 + nmu*effmu
+    eff_power = eff0 * effmu**nmu
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        denom = eff_power * (eff_linear/eff_power)**syst
+        mu = mcyield / denom
+
+        dlogd_eff0 = (1-syst)/eff0 + syst/eff_linear
+        dlogd_effmu = nmu*((1-syst)/effmu + syst/eff_linear)
+    dmu = -mu[...,None] * np.concatenate([
+        dlogd_eff0[...,None]*deff0, dlogd_effmu[...,None]*deffmu,
+    ], axis=-1)
+
+    # Same clamp as the workspace: mu*(mu>0) + 1e-7
+    positive = mu > 0
+    mu = np.where(positive, mu, 0.) + 1e-7
+    dmu = np.where(positive[...,None], dmu, 0.)
+    return mu, dmu
+
+def nll_and_grad(params, xcent, data, mcyield, nmu, syst=0.):
+    mu, dmu = model_yields(params, xcent, mcyield, nmu, syst)
+    nll = (mu - data*np.log(mu)).sum(axis=(-2, -1))
+    grad = ((1 - data/mu)[...,None] * dmu).sum(axis=(-3, -2))
+    return nll, grad
+
+def hessian(params, args, step=1e-4):
+    # Central differences of the analytic gradient, all shifts in one batch
+    shifts = np.diag(step*np.maximum(np.abs(params), 1.))
+    _, grads = nll_and_grad(np.concatenate([params+shifts, params-shifts]), *args)
+    npar = params.shape[0]
+    hess = (grads[:npar] - grads[npar:]) / (2*np.diag(shifts)[:,None])
+    return 0.5*(hess + hess.T)
+
+def fit(xcent, data, mcyield, nmu, syst=0., start=param_start, bounds=param_bounds):
+    args = (xcent, data, mcyield, nmu, syst)
+    result = minimize(
+        lambda p: nll_and_grad(p, *args), start, jac=True,
+        method="L-BFGS-B", bounds=bounds,
+    )
+    try:
+        cov = np.linalg.inv(hessian(result.x, args))
+    except np.linalg.LinAlgError:
+        cov = np.full((result.x.shape[0], result.x.shape[0]), np.nan)
+    return result, cov
+
+def main():
+    options = parse_args()
+    processes = options.processes.split(",")
+    xcent, data, mcyield, nmu = get_inputs(options.input, processes)
+
+    start = time.time()
+    result, cov = fit(xcent, data, mcyield, nmu, options.syst)
+    elapsed = time.time() - start
+
+    print(result.message)
+    print("NLL = {:.6f} ({} evaluations, {:.1f} ms)".format(
+        result.fun, result.nfev, 1e3*elapsed,
+    ))
+    errs = np.sqrt(np.abs(np.diag(cov)))
+    for name, value, err in zip(param_names, result.x, errs):
+        print("{:>8} = {:.4f} +/- {:.4f}".format(name, value, err))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
+import argparse
 import ROOT
 import numpy as np
 
-def create_workspace(bins, processes, data_dict, proc_dict, output):
+nmu_map = {"singlemu": 1, "doublemu": 2, "triplemu": 3}
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-i", "--input", type=str,
+                        default="Zinv_METnoX-ShapeTemplates_met_trigger.root",
+                        help="Input file with the trigger shape templates")
+    parser.add_argument("-o", "--output", type=str, default="workspace.root:wspace",
+                        help="Output file and workspace name")
+    parser.add_argument("--compact", action='store_true', default=False,
+                        help="Build one fused yield function per bin instead "\
+                             "of the per-bin graph of formula nodes")
+
+    return parser.parse_args()
+
+def compact_yield_formula(xcent, mcyield, nmu):
+    # Single expression equivalent to the chain of eff0, effmu, linear, power,
+    # formula and abs nodes built per bin in the default mode. Parameters are
+    # @0-@6 = eff0, mean0, sigma0, effmu, meanmu, sigmamu, syst
+    eff0 = "(@0*0.5*(1 + TMath::Erf(({0}-@1)/(@2*sqrt(2)))))".format(xcent)
+    effmu = "(@3*0.5*(1 + TMath::Erf(({0}-@4)/(@5*sqrt(2)))))".format(xcent)
+    eff_linear = "({0}+{1}*{2})".format(eff0, effmu, nmu)
+    eff_power = "({0}*TMath::Power({1}, {2}))".format(eff0, effmu, nmu)
+    formula = "({0}/({1}*TMath::Power({2}/{1}, @6)))".format(
+        repr(float(mcyield)), eff_power, eff_linear,
+    )
+    return "TMath::Max({}, 0.) + 1e-7".format(formula)
+
+def create_workspace(bins, processes, data_dict, proc_dict, output, compact=False):
     # I/O
     filename, wsname = output.split(":")
     rootfile = ROOT.TFile(filename, "RECREATE")
@@ -42,8 +72,24 @@ def create_workspace(bins, processes, data_dict, proc_dict, output):
 
         # MC
         signal = proc_dict[proc]
+        nmu = nmu_map[proc]
         arglist_formvar_yields = ROOT.RooArgList()
+        if compact:
+            arglist_params = ROOT.RooArgList()
+            for param in ["eff0", "mean0", "sigma0", "effmu", "meanmu", "sigmamu", "syst"]:
+                arglist_params.add(wspace.var(param))
         for ibin in range(bins.shape[0]-1):
+            if compact:
+                formvar_yield = ROOT.RooFormulaVar(
+                    "mcyield_cat_{}_bin_{}".format(proc, ibin),
+                    "mcyield_cat_{}_bin_{}".format(proc, ibin),
+                    compact_yield_formula(bins_cent[ibin], signal[ibin], nmu),
+                    arglist_params,
+                )
+                getattr(wspace, 'import')(formvar_yield, ROOT.RooFit.RecycleConflictNodes())
+                arglist_formvar_yields.add(wspace.function(formvar_yield.GetName()))
+                continue
+
             # Nominal
             mcyield = signal[ibin]
             mcyield_err = np.sqrt(signal[ibin])
@@ -81,7 +127,6 @@ def create_workspace(bins, processes, data_dict, proc_dict, output):
             getattr(wspace, 'import')(eff0)
             getattr(wspace, 'import')(effmu)
 
-            nmu = {"singlemu": 1, "doublemu": 2, "triplemu": 3}[proc]
             eff_linear = ROOT.RooFormulaVar(
                 "mcyield_linear_cat_{}_bin_{}".format(proc, ibin),
                 "mcyield_linear_cat_{}_bin_{}".format(proc, ibin),
@@ -154,18 +199,20 @@ def get_hist(pathname):
            np.array([obj.GetBinError(i) for i in range(1, obj.GetNbinsX()+1)])
 
 def main():
-    bins, singlemu, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:singlemu/data_obs")
-    _, doublemu, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:doublemu/data_obs")
-    _, triplemu, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:triplemu/data_obs")
-    _, singlemu_pass, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:singlemu/singlemu_pass")
-    _, doublemu_pass, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:doublemu/doublemu_pass")
-    _, triplemu_pass, _ = get_hist("Zinv_METnoX-ShapeTemplates_met_trigger.root:triplemu/triplemu_pass")
+    options = parse_args()
+    bins, singlemu, _ = get_hist("{}:singlemu/data_obs".format(options.input))
+    _, doublemu, _ = get_hist("{}:doublemu/data_obs".format(options.input))
+    _, triplemu, _ = get_hist("{}:triplemu/data_obs".format(options.input))
+    _, singlemu_pass, _ = get_hist("{}:singlemu/singlemu_pass".format(options.input))
+    _, doublemu_pass, _ = get_hist("{}:doublemu/doublemu_pass".format(options.input))
+    _, triplemu_pass, _ = get_hist("{}:triplemu/triplemu_pass".format(options.input))
     create_workspace(
         bins,
         ["singlemu", "doublemu", "triplemu"],
         {"singlemu": singlemu, "doublemu": doublemu, "triplemu": triplemu},
         {"singlemu": singlemu_pass, "doublemu": doublemu_pass, "triplemu": triplemu_pass},
-        "workspace.root:wspace",
+        options.output,
+        compact=options.compact,
     )
 
 if __name__ == "__main__":